@@ -433,6 +433,21 @@ TELEGRAM_BOT_TOKENS = {
     'toxic_ex': os.getenv('TELEGRAM_BOT_TOKEN_TOXIC_EX', ''),
 }
 
+# Webhook delivery - leave WEBHOOK_BASE_URL empty to fall back to long polling.
+# All persona bots share one server on WEBHOOK_PORT; Telegram posts to
+# {WEBHOOK_BASE_URL}/{archetype} and the reverse proxy forwards to /{archetype}.
+WEBHOOK_BASE_URL = os.getenv('WEBHOOK_BASE_URL', '').rstrip('/')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', 8443))
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET', '')
+
+# HTTP connection pool for outbound Bot API calls. getUpdates gets its own
+# single-connection pool so long polling never holds an outbound slot.
+TELEGRAM_POOL_SIZE = int(os.getenv('TG_POOL_SIZE', 32))
+TELEGRAM_POOL_TIMEOUT = float(os.getenv('TG_POOL_TIMEOUT', 10))
+
+# Self-hosted telegram-bot-api server (e.g. http://127.0.0.1:8081); empty = api.telegram.org
+TELEGRAM_LOCAL_API_URL = os.getenv('TELEGRAM_LOCAL_API_URL', '').rstrip('/')
+
 def get_telegram_bot_username(archetype: str) -> str:
     """Get Telegram bot username for a specific archetype."""
     return TELEGRAM_BOTS.get(archetype, TELEGRAM_BOTS['golden_retriever'])
@@ -445,6 +460,16 @@ def get_telegram_bot_token(archetype: str) -> str:
         token = os.getenv('TELEGRAM_BOT_TOKEN', '')
     return token
 
+def get_telegram_api_kwargs() -> dict:
+    """Bot/ApplicationBuilder endpoint settings for the local Bot API server, if configured."""
+    if not TELEGRAM_LOCAL_API_URL:
+        return {}
+    return {
+        'base_url': f"{TELEGRAM_LOCAL_API_URL}/bot",
+        'base_file_url': f"{TELEGRAM_LOCAL_API_URL}/file/bot",
+        'local_mode': True,
+    }
+
 def get_telegram_deep_link(archetype: str, token: str) -> str:
     """Generate Telegram deep link for a specific archetype and token."""
     bot_username = get_telegram_bot_username(archetype)
@@ -466,10 +491,24 @@ API_HOST = "0.0.0.0"
 API_PORT = int(os.getenv("API_PORT", 8001))
 API_WORKERS = 4 if ENVIRONMENT == "production" else 1
 
+# ==========================================
+# AUTHENTICATION
+# ==========================================
+
+# bcrypt work factor for new password hashes (each +1 doubles hashing time);
+# existing hashes keep the cost they were created with
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+
 # ==========================================
 # REDIS CONFIGURATION (for Celery)
 # ==========================================
 
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 CELERY_BROKER_URL = REDIS_URL
-CELERY_RESULT_BACKEND = REDIS_URL
\ No newline at end of file
+CELERY_RESULT_BACKEND = REDIS_URL
+
+# Sorted set of user_id -> epoch seconds at which the user is next checked
+# for a proactive message
+PROACTIVE_NEXT_KEY = "proactive:next"
+# How often the Celery beat due-check task polls that set
+PROACTIVE_DUE_CHECK_SECONDS = 60
\ No newline at end of file
@@ -1,46 +1,19 @@
-import os
-from datetime import datetime, timedelta
+from datetime import timedelta
 from typing import Any, Dict, Optional
 
-import bcrypt
-import jwt
 from fastapi import HTTPException, status
 from sqlalchemy import or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from models.models import Token, UserCreate
 from models.sql_models import BotSettings, User
-
-SECRET_KEY = os.getenv("SECRET_KEY", "c2fb03d064ff4ed71c8e85905addd4e0")
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
-
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify password against bcrypt hash."""
-    try:
-        return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
-    except Exception:
-        return False
-
-
-def get_password_hash(password: str) -> str:
-    """Generate bcrypt hash for password."""
-    salt = bcrypt.gensalt()
-    return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
-
-
-def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
-    """Create JWT access token."""
-    to_encode = data.copy()
-    expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-
-
-def decode_access_token(token: str) -> Dict[str, Any]:
-    """Decode JWT and return payload."""
-    return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+from utils.auth import (
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    create_access_token,
+    decode_access_token,
+    hash_password_async,
+    verify_password_async,
+)
 
 
 async def login_for_access_token(db: AsyncSession, email: str, password: str) -> Token:
@@ -59,7 +32,7 @@ async def login_for_access_token(db: AsyncSession, email: str, password: str) ->
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    if not user.password_hash or not verify_password(password, user.password_hash):
+    if not user.password_hash or not await verify_password_async(password, user.password_hash):
         raise credentials_exception
 
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -96,7 +69,7 @@ async def login_user(db: AsyncSession, email: Optional[str], telegram_id: Option
             detail="Your account has been deactivated by an administrator. Please contact support.",
         )
 
-    if email and password and (not user.password_hash or not verify_password(password, user.password_hash)):
+    if email and password and (not user.password_hash or not await verify_password_async(password, user.password_hash)):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -121,7 +94,7 @@ async def register_user(db: AsyncSession, user_data: UserCreate) -> Dict[str, An
     if existing_user.scalar_one_or_none():
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Username or email already exists")
 
-    password_hash = get_password_hash(user_data.password) if user_data.password else None
+    password_hash = await hash_password_async(user_data.password) if user_data.password else None
     user = User(
         username=user_data.username,
         email=user_data.email,
@@ -165,7 +138,7 @@ async def register_admin_user(db: AsyncSession, user_data: UserCreate, current_a
     if existing_user.scalar_one_or_none():
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Username or email already exists")
 
-    password_hash = get_password_hash(user_data.password) if user_data.password else None
+    password_hash = await hash_password_async(user_data.password) if user_data.password else None
     user = User(
         username=user_data.username,
         email=user_data.email,
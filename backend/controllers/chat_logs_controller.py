@@ -29,7 +29,7 @@ async def chat_history(
     return {
         "user_id": str(user_id),
         "bot_id": bot_id,
-        "date": date or datetime.utcnow().strftime("%Y-%m-%d"),
+        "date": date or datetime.utcnow().date().isoformat(),
         "conversations": history,
         "count": len(history),
         "timestamp": datetime.utcnow().isoformat(),
@@ -5,14 +5,17 @@ from datetime import datetime
 from typing import Any, Dict, Optional
 
 from fastapi import HTTPException, WebSocket, WebSocketDisconnect, status
-from sqlalchemy import desc, select
+from sqlalchemy import desc, exists, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from models import MessageSend
 from models.sql_models import BotSettings, Message, User
 from services.boundary_manager import BoundaryManager
 from services.llm_client import OpenAILLMClient
+from utils.auth import invalidate_user
 from utils.chat_logger import chat_logger
+from utils.rate_limiter import RateLimiter
+from utils.timezone import get_timezone, get_utc_epoch, to_epoch
 
 logger = logging.getLogger(__name__)
 
@@ -81,14 +84,6 @@ async def send_message(request: MessageSend, current_user: User, db: AsyncSessio
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    from constants import MESSAGE_LIMITS
-    daily_limit = MESSAGE_LIMITS.get(user.tier or "free", 20)
-    if (user.messages_today or 0) >= daily_limit:
-        raise HTTPException(
-            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail=f"Daily message limit ({daily_limit}) reached. Upgrade for more messages.",
-        )
-
     bot_id = request.bot_id
     if bot_id and isinstance(bot_id, str):
         try:
@@ -106,9 +101,17 @@ async def send_message(request: MessageSend, current_user: User, db: AsyncSessio
     # Capture archetype now before any commits expire the settings object
     bot_archetype = settings.archetype or "unknown"
 
+    # Check and count against the daily limit in one statement; committed
+    # together with the user message below
+    can_send, _, daily_limit = await RateLimiter(db).check_and_increment_daily(current_user.id)
+    if not can_send:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Daily message limit ({daily_limit}) reached. Upgrade for more messages.",
+        )
+
     user_message = Message(user_id=current_user.id, bot_id=bot_id, role="user", content=request.message, message_type="reactive")
     db.add(user_message)
-    user.messages_today = (user.messages_today or 0) + 1
     await db.commit()
     await db.refresh(user_message)
 
@@ -515,8 +518,7 @@ async def _check_proactive_gates(user: User, settings: Optional[BotSettings], bo
         return {"success": False, "reason": "space_boundary_active", "details": space_reason}
     
     # Gate 2: Time of day
-    import pytz
-    user_tz = pytz.timezone(user.timezone or "UTC")
+    user_tz = get_timezone(user.timezone or "UTC")
     hour = datetime.now(user_tz).hour
     
     if hour >= 23 or hour < 7:
@@ -531,14 +533,14 @@ async def _check_proactive_gates(user: User, settings: Optional[BotSettings], bo
     
     # Gate 4: Pending questions
     pending = await db.execute(
-        select(Message.id).where(
+        select(exists().where(
             Message.user_id == user.id,
             Message.role == "bot",
             Message.is_question == True,
             Message.question_answered == False,
-        ).limit(1)
+        ))
     )
-    if pending.scalar_one_or_none():
+    if pending.scalar():
         return {"success": False, "reason": "pending_questions", "details": "User has unanswered bot questions"}
     
     # Gate 5: Daily limit
@@ -563,7 +565,7 @@ async def _check_proactive_gates(user: User, settings: Optional[BotSettings], bo
     last_proactive = last_proactive_result.scalar_one_or_none()
     
     if last_proactive:
-        hours_since = (datetime.utcnow() - last_proactive).total_seconds() / 3600
+        hours_since = (get_utc_epoch() - to_epoch(last_proactive)) / 3600
         if hours_since < cooldown_hours:
             return {"success": False, "reason": "cooldown_not_met", "details": f"{hours_since:.1f}h < {cooldown_hours}h"}
     
@@ -576,14 +578,16 @@ async def send_proactive_message(current_user: User, db: AsyncSession) -> Dict[s
         boundary_manager = BoundaryManager(db)
         settings = await _get_bot_settings(db, current_user.id)
         
+        # current_user may come from the auth cache; gate on the stored count
+        await db.refresh(current_user, ["proactive_count_today"])
+        
         # Check all gates
         gate_error = await _check_proactive_gates(current_user, settings, boundary_manager, db)
         if gate_error:
             return gate_error
         
         # Generate message
-        import pytz
-        user_tz = pytz.timezone(current_user.timezone or "UTC")
+        user_tz = get_timezone(current_user.timezone or "UTC")
         hour = datetime.now(user_tz).hour
         time_of_day = "morning" if 6 <= hour < 12 else "afternoon" if 12 <= hour < 18 else "evening"
         
@@ -612,8 +616,13 @@ async def send_proactive_message(current_user: User, db: AsyncSession) -> Dict[s
         
         bot_message = Message(user_id=current_user.id, role="bot", content=response, message_type="proactive")
         db.add(bot_message)
-        current_user.proactive_count_today = (current_user.proactive_count_today or 0) + 1
+        await db.execute(
+            update(User)
+            .where(User.id == current_user.id)
+            .values(proactive_count_today=func.coalesce(User.proactive_count_today, 0) + 1)
+        )
         await db.commit()
+        invalidate_user(current_user.id)
         
         return {"success": True, "message": response, "timestamp": datetime.utcnow().isoformat()}
         
@@ -1,9 +1,7 @@
 import uuid
-from datetime import timedelta
+from datetime import timedelta, timezone
 from typing import Any, Dict
 
-import bcrypt
-import pytz
 from fastapi import HTTPException
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -11,6 +9,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from constants import MESSAGE_LIMITS, PROACTIVE_LIMITS
 from models.models import UserCreate, UserResponse
 from models.sql_models import BotSettings, Message, User
+from utils.auth import hash_password_async
 from utils.timezone import get_utc_now, to_user_timezone
 
 
@@ -21,11 +20,8 @@ async def register_user(db: AsyncSession, user_create: UserCreate) -> UserRespon
     if existing_user.scalar_one_or_none():
         raise HTTPException(status_code=400, detail="Username or email already exists")
 
-    password_hash = (
-        bcrypt.hashpw(user_create.password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
-        if user_create.password
-        else None
-    )
+    # bcrypt is CPU-bound; hash in a worker thread to keep the event loop free
+    password_hash = await hash_password_async(user_create.password) if user_create.password else None
 
     user = User(
         username=user_create.username,
@@ -151,7 +147,7 @@ async def user_stats(current_user: User, db: AsyncSession) -> Dict[str, Any]:
 
     user_tz_now = to_user_timezone(get_utc_now(), current_user.timezone or "UTC")
     today_start_user = user_tz_now.replace(hour=0, minute=0, second=0, microsecond=0)
-    today_start = today_start_user.astimezone(pytz.UTC).replace(tzinfo=None)
+    today_start = today_start_user.astimezone(timezone.utc).replace(tzinfo=None)
     today_messages = await db.execute(
         select(func.count(Message.id)).where(Message.user_id == current_user.id, Message.created_at >= today_start)
     )
@@ -192,11 +188,9 @@ async def analytics(user_id: str, current_user: User, db: AsyncSession) -> Dict[
     total_count = total_messages.scalar() or 0
 
     user = await db.get(User, target_uuid)
-    user_tz = pytz.timezone(user.timezone or "UTC") if user else pytz.UTC
-
     user_tz_now = to_user_timezone(get_utc_now(), user.timezone or "UTC" if user else "UTC")
     today_start_user = user_tz_now.replace(hour=0, minute=0, second=0, microsecond=0)
-    today_start = today_start_user.astimezone(pytz.UTC).replace(tzinfo=None)
+    today_start = today_start_user.astimezone(timezone.utc).replace(tzinfo=None)
 
     today_messages = await db.execute(
         select(func.count(Message.id)).where(Message.user_id == target_uuid, Message.created_at >= today_start)
@@ -204,14 +198,14 @@ async def analytics(user_id: str, current_user: User, db: AsyncSession) -> Dict[
     today_count = today_messages.scalar() or 0
 
     week_start = today_start_user - timedelta(days=7)
-    week_start_utc = week_start.astimezone(pytz.UTC).replace(tzinfo=None)
+    week_start_utc = week_start.astimezone(timezone.utc).replace(tzinfo=None)
     weekly_messages = await db.execute(
         select(func.count(Message.id)).where(Message.user_id == target_uuid, Message.created_at >= week_start_utc)
     )
     weekly_count = weekly_messages.scalar() or 0
 
     month_start = today_start_user.replace(day=1)
-    month_start_utc = month_start.astimezone(pytz.UTC).replace(tzinfo=None)
+    month_start_utc = month_start.astimezone(timezone.utc).replace(tzinfo=None)
     monthly_messages = await db.execute(
         select(func.count(Message.id)).where(Message.user_id == target_uuid, Message.created_at >= month_start_utc)
     )
@@ -16,6 +16,8 @@ from services.llm_client import OpenAILLMClient
 from services.message_analyzer import MessageAnalyzer
 from services.proactive_scheduler import ProactiveWorker
 from services.question_tracker import QuestionTracker
+from utils.chat_logger import chat_logger
+from utils.rate_limiter import flush_daily_counts, stop_daily_count_flusher
 
 logger = logging.getLogger(__name__)
 
@@ -44,13 +46,10 @@ class JobManager:
             self.memory_summarizer = MemorySummarizer(AsyncSessionLocal(), self.llm_client)
             self.proactive_checker = ProactiveMeetingChecker()
 
-            worker_db = AsyncSessionLocal()
             self.proactive_worker = ProactiveWorker(
-                db=worker_db,
+                session_factory=AsyncSessionLocal,
                 context_builder_class=ContextBuilder,
                 llm_client=self.llm_client,
-                boundary_manager=BoundaryManager(worker_db),
-                analytics=Analytics(worker_db),
             )
 
             self._tasks.append(asyncio.create_task(self.daily_reset_job.run()))
@@ -119,6 +118,7 @@ class ServiceContainer:
             self.llm_client = OpenAILLMClient()
             self.job_manager = JobManager(self.llm_client)
             await self.job_manager.start()
+            await chat_logger.start()
             self._started = True
             logger.info("Service container initialized")
 
@@ -127,6 +127,10 @@ class ServiceContainer:
             return
         if self.job_manager:
             await self.job_manager.stop()
+        # Stop the periodic flusher first so the final flush can't race it
+        await stop_daily_count_flusher()
+        await flush_daily_counts()
+        await chat_logger.stop()
         self._started = False
         logger.info("Service container shut down")
 
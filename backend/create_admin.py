@@ -20,13 +20,14 @@ from utils.timezone import get_utc_now
 load_dotenv()
 
 # Import database and models
+from constants import BCRYPT_ROUNDS
 from database import AsyncSessionLocal, engine, Base
 from models.sql_models import User, BotSettings
 
 
 def hash_password(password: str) -> str:
     """Hash a password using bcrypt."""
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
     return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
 
 
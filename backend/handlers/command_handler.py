@@ -11,7 +11,7 @@ from typing import Optional, Dict, Any
 from constants import SUPPORT_RESPONSE, FIRST_MESSAGES
 from handlers.user_helpers import get_or_create_user
 from utils.tone_generator import generate_tone_summary
-from utils.timezone import get_utc_now
+from utils.timezone import format_many_for_user, get_utc_now
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +28,20 @@ def escape_markdown(text: str) -> str:
 class CommandHandler:
     """Handles Telegram bot commands."""
     
+    # command -> (handler method name, whether it takes the archetype argument)
+    COMMAND_HANDLERS = {
+        "start": ("_handle_start", True),
+        "support": ("_handle_support", False),
+        "settings": ("_handle_settings", True),
+        "personality": ("_handle_personality", True),
+        "summary": ("_handle_summary", True),
+        "forget": ("_handle_forget", False),
+        "boundaries": ("_handle_boundaries", False),
+        "reset": ("_handle_reset", False),
+        "schedule": ("_handle_schedule", True),
+        "help": ("_handle_help", False),
+    }
+    
     def __init__(self, db, analytics):
         self.db = db
         self.analytics = analytics
@@ -64,32 +78,15 @@ class CommandHandler:
             
             command = command.lower().strip()
             
-            handlers = {
-                "start": self._handle_start,
-                "support": self._handle_support,
-                "settings": self._handle_settings,
-                "personality": self._handle_personality,
-                "summary": self._handle_summary,
-                "forget": self._handle_forget,
-                "boundaries": self._handle_boundaries,
-                "reset": self._handle_reset,
-                "schedule": self._handle_schedule,
-                "help": self._handle_help,
-            }
-            
-            handler = handlers.get(command)
-            if handler:
+            entry = self.COMMAND_HANDLERS.get(command)
+            if entry:
+                method_name, takes_archetype = entry
+                handler = getattr(self, method_name)
                 try:
-                    # Try to call handler with archetype parameter
-                    try:
-                        logger.debug(f"Calling handler {command} with archetype={archetype}")
-                        result = await handler(user_id, user, args, archetype)
-                        return result
-                    except TypeError as te:
-                        # Handler doesn't accept archetype, try without it
-                        logger.debug(f"Handler {command} doesn't accept archetype, retrying without it")
-                        result = await handler(user_id, user, args)
-                        return result
+                    logger.debug(f"Calling handler {command} with archetype={archetype}")
+                    if takes_archetype:
+                        return await handler(user_id, user, args, archetype)
+                    return await handler(user_id, user, args)
                         
                 except Exception as handler_error:
                     logger.error(f"❌ Error in command handler {command}: {handler_error}", exc_info=True)
@@ -708,21 +705,15 @@ class CommandHandler:
             user_tz = user.get('timezone', 'UTC')
             message = "📅 *your upcoming schedule:*\n\n"
             
-            for schedule in schedules:
-                # Convert to user's timezone for display
-                # Handle naive datetimes properly
-                try:
-                    import pytz
-                    tz = pytz.timezone(user_tz)
-                    # Since start_time is naive, we treat it as UTC for conversion
-                    local_time = schedule.start_time.replace(tzinfo=pytz.UTC).astimezone(tz)
-                    time_str = local_time.strftime("%a, %b %d at %I:%M %p")
-                except Exception as tz_err:
-                    logger.debug(f"Timezone conversion failed: {tz_err}, using raw time")
-                    time_str = schedule.start_time.strftime("%a, %b %d at %I:%M %p") if schedule.start_time else "N/A"
-                
+            # Convert to user's timezone for display (naive start times are UTC;
+            # unknown timezones fall back to UTC)
+            time_strs = format_many_for_user(
+                (schedule.start_time for schedule in schedules), user_tz, "%a, %b %d at %I:%M %p"
+            )
+            
+            for schedule, time_str in zip(schedules, time_strs):
                 status = "✅ done" if schedule.is_completed else "⏳ upcoming"
-                message += f"• *{schedule.event_name}*\n  {time_str} {status}\n"
+                message += f"• *{schedule.event_name}*\n  {time_str or 'N/A'} {status}\n"
             
             message += f"\n_use /support if you need to change something_"
             return message
@@ -175,11 +175,11 @@ class MessageHandler:
             )
             await self.db.execute(stmt)
             
-            # Increment daily count (using SQLAlchemy model)
+            # Increment daily count (batched; the activity update above is
+            # committed together with the user message below)
             user_obj = await self.db.get(User, user_uuid)
             if user_obj:
-                user_obj.messages_today += 1
-                await self.db.commit()
+                await self.rate_limiter.increment_daily_count(user_uuid)
             
             # Detect mood
             detected_mood = self.mood_detector.detect(message_text)
@@ -293,20 +293,25 @@ class MessageHandler:
             # Generate response
             response = await self._generate_safe(user_id, context)
             
+            # Track questions in response as part of the insert
+            is_question, question_topic = self.question_tracker.analyze_bot_message(response)
+            
             # Save bot message
             bot_msg = Message(
                 user_id=user_uuid,
                 role='bot',
                 content=response,
-                message_type='reactive'
+                message_type='reactive',
+                is_question=is_question,
+                question_topic=question_topic,
+                question_answered=False
             )
             
             self.db.add(bot_msg)
             await self.db.commit()
-            await self.db.refresh(bot_msg)
             
-            # Track questions in response
-            await self.question_tracker.on_bot_message(user_id, response, bot_msg.id)
+            if is_question:
+                logger.debug(f"Question tracked: {question_topic or 'general'} for user {user_id}")
             
             return response
             
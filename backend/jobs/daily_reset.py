@@ -6,10 +6,11 @@ import asyncio
 import logging
 from datetime import datetime, date
 from typing import List
-import pytz
 from sqlalchemy import select, update, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from utils.timezone import get_timezone
+
 logger = logging.getLogger(__name__)
 
 
@@ -82,7 +83,7 @@ class DailyResetJob:
         
         for tz_str in timezones:
             try:
-                tz = pytz.timezone(tz_str)
+                tz = get_timezone(tz_str)
                 local_date = datetime.now(tz).date()
             except Exception:
                 local_date = datetime.utcnow().date()
@@ -109,7 +110,7 @@ class DailyResetJob:
         """Reset counters for a single user."""
         
         try:
-            tz = pytz.timezone(timezone or 'UTC')
+            tz = get_timezone(timezone or 'UTC')
             local_date = datetime.now(tz).date()
         except Exception:
             local_date = datetime.utcnow().date()
@@ -128,6 +129,9 @@ class DailyResetJob:
         )
         await self.db.commit()
         
+        from utils.auth import invalidate_user
+        invalidate_user(user_id)
+        
         logger.debug(f"[DailyReset] Reset user {user_id} for {local_date}")
     
     def stop(self):
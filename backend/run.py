@@ -277,5 +277,12 @@ async def main():
         await manager.stop_services()
 
 if __name__ == "__main__":
+    # Prefer libuv's event loop when available
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+    
     # Run the main async function
     asyncio.run(main())
\ No newline at end of file
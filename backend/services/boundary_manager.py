@@ -13,6 +13,7 @@ from sqlalchemy import select, update, and_, or_
 from constants import SPACE_BOUNDARY_COOLDOWN_HOURS
 from models.sql_models import UserBoundary
 from models import BoundaryType
+from utils.timezone import get_utc_epoch, to_epoch
 
 logger = logging.getLogger(__name__)
 
@@ -291,7 +292,7 @@ class BoundaryManager:
             return (True, "user_initiated")
         
         # Check if 24 hours passed
-        hours_since = (datetime.utcnow() - boundary_created).total_seconds() / 3600
+        hours_since = (get_utc_epoch() - to_epoch(boundary_created)) / 3600
         
         if hours_since >= SPACE_BOUNDARY_COOLDOWN_HOURS:
             return (True, "cooldown_expired")
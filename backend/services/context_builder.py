@@ -5,13 +5,12 @@ Context builder for LLM requests
 import logging
 from datetime import datetime
 from typing import Dict, Any, List, Optional
-import pytz
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, desc
 
 from constants import ARCHETYPE_DEFAULTS, ARCHETYPE_INSTRUCTIONS
 from utils.tone_generator import generate_tone_summary
-from utils.timezone import get_utc_now, to_user_timezone, format_for_user
+from utils.timezone import get_timezone, get_utc_now, to_user_timezone, format_for_user
 from models.sql_models import (
     User, BotSettings, Message, UserBoundary, 
     UserMemory, MoodHistory, ProactiveLog
@@ -59,7 +58,7 @@ class ContextBuilder:
         memory_context = await self._get_memory_context()
         
         # Calculate time context
-        user_tz = pytz.timezone(user.timezone or 'UTC')
+        user_tz = get_timezone(user.timezone or 'UTC')
         user_local_time = datetime.now(user_tz)
         time_of_day = self._get_time_of_day(user_local_time.hour)
         
@@ -9,11 +9,10 @@ from datetime import datetime, timezone, timedelta
 from typing import Optional, List
 from sqlalchemy.ext.asyncio import AsyncSession
 import uuid
-import pytz
 
 from models.sql_models import UserSchedule, User, Message, BotSettings
 from services.meeting_extractor import MeetingExtractor, LLMMeetingExtractor, MeetingInfo
-from utils.timezone import get_utc_now
+from utils.timezone import get_timezone, get_utc_now, to_utc_batch
 
 logger = logging.getLogger(__name__)
 
@@ -52,9 +51,8 @@ class MessageAnalyzer:
             # Extract meetings from the message
             # Use UTC as reference, but convert to user's timezone for extraction
             # This ensures relative times like "in 1 minute" are in user's timezone
-            utc_now = get_utc_now()
-            user_tz = pytz.timezone(user.timezone or 'UTC')
-            user_now = utc_now.replace(tzinfo=pytz.UTC).astimezone(user_tz).replace(tzinfo=None)
+            user_tz = get_timezone(user.timezone or 'UTC')
+            user_now = datetime.now(user_tz).replace(tzinfo=None)
             
             meetings = []
             if self.llm_meeting_extractor:
@@ -99,24 +97,11 @@ class MessageAnalyzer:
                     
                     # Create new schedule
                     # Convert extracted times from user's timezone to UTC for storage
-                    start_time_utc = None
-                    end_time_utc = None
-                    
-                    if meeting.start_time:
-                        # meeting.start_time is naive, extracted in user's timezone context
-                        # Localize it to user's timezone, then convert to UTC
-                        if meeting.start_time.tzinfo is None:
-                            localized = user_tz.localize(meeting.start_time)
-                            start_time_utc = localized.astimezone(pytz.UTC).replace(tzinfo=None)
-                        else:
-                            start_time_utc = meeting.start_time.astimezone(pytz.UTC).replace(tzinfo=None)
-                    
-                    if meeting.end_time:
-                        if meeting.end_time.tzinfo is None:
-                            localized = user_tz.localize(meeting.end_time)
-                            end_time_utc = localized.astimezone(pytz.UTC).replace(tzinfo=None)
-                        else:
-                            end_time_utc = meeting.end_time.astimezone(pytz.UTC).replace(tzinfo=None)
+                    # (naive times were extracted in the user's timezone context)
+                    start_time_utc, end_time_utc = to_utc_batch(
+                        (meeting.start_time, meeting.end_time),
+                        user.timezone or 'UTC'
+                    )
                     
                     schedule = UserSchedule(
                         id=uuid.uuid4(),
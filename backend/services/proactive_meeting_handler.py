@@ -13,7 +13,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, or_
 
 from models.sql_models import UserSchedule, User, ProactiveSession, GreetingPreference, BotSettings, Message
-import pytz
+from utils.timezone import format_for_user, get_timezone
 
 logger = logging.getLogger(__name__)
 
@@ -92,12 +92,23 @@ class ProactiveMeetingHandler:
             now = datetime.utcnow()
             followup_window = now - timedelta(minutes=self.FOLLOWUP_DELAY_MINUTES)
 
-            # --- Case 1: meetings WITH an explicit end_time ---
+            # Meetings WITH an explicit end_time are due once it has passed; meetings
+            # WITHOUT one assume DEFAULT_MEETING_DURATION_MINUTES. Both cases go in
+            # a single scan so the database does the window test for every row.
+            assumed_end_cutoff = now - timedelta(minutes=self.DEFAULT_MEETING_DURATION_MINUTES + self.FOLLOWUP_DELAY_MINUTES)
             result = await self.db.execute(
                 select(UserSchedule).where(
                     and_(
-                        UserSchedule.end_time.isnot(None),
-                        UserSchedule.end_time <= followup_window,
+                        or_(
+                            and_(
+                                UserSchedule.end_time.isnot(None),
+                                UserSchedule.end_time <= followup_window,
+                            ),
+                            and_(
+                                UserSchedule.end_time.is_(None),
+                                UserSchedule.start_time <= assumed_end_cutoff,
+                            ),
+                        ),
                         UserSchedule.event_completed_sent == False,
                         UserSchedule.is_completed == False
                     )
@@ -105,20 +116,6 @@ class ProactiveMeetingHandler:
             )
             completed_meetings = result.scalars().all()
 
-            # --- Case 2: meetings WITHOUT end_time — assume DEFAULT_MEETING_DURATION_MINUTES ---
-            assumed_end_cutoff = now - timedelta(minutes=self.DEFAULT_MEETING_DURATION_MINUTES + self.FOLLOWUP_DELAY_MINUTES)
-            result2 = await self.db.execute(
-                select(UserSchedule).where(
-                    and_(
-                        UserSchedule.end_time.is_(None),
-                        UserSchedule.start_time <= assumed_end_cutoff,
-                        UserSchedule.event_completed_sent == False,
-                        UserSchedule.is_completed == False
-                    )
-                )
-            )
-            completed_meetings = list(completed_meetings) + list(result2.scalars().all())
-
             for schedule in completed_meetings:
                 try:
                     sent = await self._send_completion_message(schedule)
@@ -373,12 +370,7 @@ class ProactiveMeetingHandler:
     
     def _format_time(self, dt: datetime, timezone: str) -> str:
         """Format datetime in user's timezone."""
-        try:
-            tz = pytz.timezone(timezone)
-            local_dt = dt.replace(tzinfo=pytz.UTC).astimezone(tz)
-            return local_dt.strftime("%I:%M %p")
-        except:
-            return dt.strftime("%I:%M %p")
+        return format_for_user(dt, timezone, "%I:%M %p")
     
     def _generate_preparation_message(self, meeting_name: str, time_str: str) -> str:
         """Generate a preparation reminder message."""
@@ -469,7 +461,7 @@ class ProactiveMeetingHandler:
         """Check if user should receive a time-based greeting right now."""
 
         # Get user's current time
-        user_tz = pytz.timezone(user.timezone or 'UTC')
+        user_tz = get_timezone(user.timezone or 'UTC')
         user_time = datetime.now(user_tz)
         current_hour = user_time.hour
 
@@ -517,7 +509,7 @@ class ProactiveMeetingHandler:
         """Send a time-based greeting to the user."""
         try:
             # Get user's timezone and current time
-            user_tz = pytz.timezone(user.timezone or 'UTC')
+            user_tz = get_timezone(user.timezone or 'UTC')
             user_time = datetime.now(user_tz)
             current_hour = user_time.hour
             
@@ -678,7 +670,7 @@ class ProactiveMeetingHandler:
         try:
             from telegram import Bot
             from telegram.request import HTTPXRequest
-            from constants import get_telegram_bot_token
+            from constants import get_telegram_bot_token, get_telegram_api_kwargs
 
             # Get the bot token for this archetype
             token = get_telegram_bot_token(archetype)
@@ -688,7 +680,7 @@ class ProactiveMeetingHandler:
 
             # Send the message with extended timeout
             request = HTTPXRequest(connect_timeout=20.0, read_timeout=20.0, write_timeout=20.0)
-            bot = Bot(token=token, request=request)
+            bot = Bot(token=token, request=request, **get_telegram_api_kwargs())
             await bot.send_message(chat_id=telegram_id, text=message)
             logger.info(f"Sent Telegram message to {telegram_id} via {archetype} bot")
             return True
@@ -5,12 +5,15 @@ Proactive message scheduling system - COMPLETE VERSION
 import asyncio
 import logging
 import random
-from datetime import datetime, timedelta
+import re
+import time
+import weakref
+from datetime import datetime, timedelta, timezone, time as dt_time
 from typing import Optional, Tuple, List, Dict, Any
+from uuid import UUID
 from sqlalchemy import or_
-import pytz
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, func
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy import select, insert, update, func, exists
 
 from constants import (
     ATTACHMENT_MODIFIERS,
@@ -19,14 +22,79 @@ from constants import (
     LATE_NIGHT_START_HOUR,
     LATE_NIGHT_END_HOUR,
     PROACTIVE_LIMITS,
+    PROACTIVE_NEXT_KEY,
+    PROACTIVE_DUE_CHECK_SECONDS,
     FEATURE_FLAGS,
+    REDIS_URL,
 )
 from models.models import ProactiveMessageType, BlockReason
 from models.sql_models import User, BotSettings, Message, ProactiveLog
+from services.analytics import Analytics
+from services.boundary_manager import BoundaryManager
+from utils.auth import invalidate_user
 from utils.chat_logger import chat_logger
+from utils.timezone import get_timezone
 
 logger = logging.getLogger(__name__)
 
+# Async Redis clients are bound to the loop they were created on, and
+# Celery tasks run each job in a fresh loop via asyncio.run()
+_redis_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def _get_redis():
+    """Return the async Redis client for the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _redis_clients.get(loop)
+    if client is None:
+        import redis.asyncio as aioredis
+        client = aioredis.from_url(REDIS_URL)
+        _redis_clients[loop] = client
+    return client
+
+
+async def _shutdown_bots(bots: Dict[str, Any]) -> None:
+    """Shut down and forget every Telegram Bot client in ``bots``."""
+    clients = list(bots.values())
+    bots.clear()
+    for bot in clients:
+        try:
+            await bot.shutdown()
+        except Exception as e:
+            logger.warning(f"Error closing Telegram bot: {e}")
+
+
+# Matches '[no_send]', 'no_send', 'dont send' and "don't send" in any case
+_NO_SEND_RE = re.compile(r"no_send|don'?t send", re.IGNORECASE)
+
+# PROACTIVE_TEMPLATES flattened to {(archetype, msg_type): (template, ...)}
+_TEMPLATE_TABLE: Dict[Tuple[str, str], Tuple[str, ...]] = {
+    (archetype, msg_type): tuple(msgs)
+    for archetype, by_type in PROACTIVE_TEMPLATES.items()
+    for msg_type, msgs in by_type.items()
+}
+
+class ProactiveContext:
+    """Data class for the state loaded while evaluating the proactive gates."""
+    
+    def __init__(
+        self,
+        user: User,
+        settings: Optional[BotSettings],
+        attachment: str,
+        archetype: str,
+        modifier: Dict[str, Any],
+        hour: int,
+        msg_type: ProactiveMessageType
+    ):
+        self.user = user
+        self.settings = settings
+        self.attachment = attachment
+        self.archetype = archetype
+        self.modifier = modifier
+        self.hour = hour
+        self.msg_type = msg_type
+
 
 class ProactiveScheduler:
     """
@@ -39,13 +107,17 @@ class ProactiveScheduler:
         context_builder_class,
         llm_client,
         boundary_manager,
-        analytics=None
+        analytics=None,
+        bots: Optional[Dict[str, Any]] = None
     ):
         self.db = db
         self.ContextBuilder = context_builder_class
         self.llm = llm_client
         self.boundary_manager = boundary_manager
         self.analytics = analytics
+        # Telegram Bot clients per archetype. ProactiveWorker passes its own
+        # dict so every scheduler it builds reuses the same connection pools
+        self._bots = bots if bots is not None else {}
     
     async def can_send(
         self, 
@@ -54,10 +126,21 @@ class ProactiveScheduler:
         """
         7-GATE VALIDATION: All gates must pass.
         """
+        ok, block_reason, details, _ = await self._can_send_core(user_id)
+        return (ok, block_reason, details)
+    
+    async def _can_send_core(
+        self, 
+        user_id: str
+    ) -> Tuple[bool, Optional[BlockReason], Optional[str], Optional[ProactiveContext]]:
+        """
+        Run the 7 gates and, when they all pass, return the loaded
+        user/settings state so callers don't have to query it again.
+        """
         
         # KILL SWITCH: Check if proactive is enabled
         if not FEATURE_FLAGS.get('proactive_enabled', True):
-            return (False, BlockReason.LLM_ERROR, "proactive_disabled")
+            return (False, BlockReason.LLM_ERROR, "proactive_disabled", None)
         
         # Get user
         user_result = await self.db.execute(
@@ -66,7 +149,7 @@ class ProactiveScheduler:
         user = user_result.scalar_one_or_none()
         
         if not user:
-            return (False, BlockReason.LLM_ERROR, "user_not_found")
+            return (False, BlockReason.LLM_ERROR, "user_not_found", None)
         
         # Get settings - prefer primary bot if multiple bots exist
         settings_result = await self.db.execute(
@@ -81,33 +164,32 @@ class ProactiveScheduler:
         
         # KILL SWITCH: Check if toxic_ex is disabled
         if archetype == 'toxic_ex' and not FEATURE_FLAGS.get('toxic_ex_enabled', True):
-            return (False, BlockReason.LLM_ERROR, "toxic_ex_disabled")
+            return (False, BlockReason.LLM_ERROR, "toxic_ex_disabled", None)
         
         modifier = ATTACHMENT_MODIFIERS.get(
             attachment, 
             ATTACHMENT_MODIFIERS['secure']
         )
         
+        # Load the DB-bound gate inputs up front
+        last_proactive, has_pending, space_allowed, space_reason, timing_boundaries = (
+            await self._load_gate_state(user_id)
+        )
+        
         # ==========================================
         # GATE 1: COOLDOWN (attachment-based)
         # ==========================================
         cooldown_hours = modifier['cooldown_hours']
         
-        last_proactive_result = await self.db.execute(
-            select(ProactiveLog.sent_at)
-            .where(ProactiveLog.user_id == user_id)
-            .order_by(ProactiveLog.sent_at.desc())
-            .limit(1)
-        )
-        last_proactive = last_proactive_result.scalar_one_or_none()
-        
         if last_proactive:
-            hours_since = (datetime.utcnow() - last_proactive).total_seconds() / 3600
+            # sent_at is naive UTC; compare as epoch seconds
+            hours_since = (time.time() - last_proactive.replace(tzinfo=timezone.utc).timestamp()) / 3600
             if hours_since < cooldown_hours:
                 return (
                     False, 
                     BlockReason.COOLDOWN_NOT_MET, 
-                    f"{hours_since:.1f}h < {cooldown_hours}h"
+                    f"{hours_since:.1f}h < {cooldown_hours}h",
+                    None
                 )
         
         # ==========================================
@@ -117,59 +199,46 @@ class ProactiveScheduler:
         tier_limit = PROACTIVE_LIMITS.get(tier, 1)
         attachment_limit = modifier['daily_max']
         daily_max = min(tier_limit, attachment_limit)
+        sent_today = user.proactive_count_today or 0
         
-        if user.proactive_count_today >= daily_max:
+        if sent_today >= daily_max:
             return (
                 False, 
                 BlockReason.DAILY_LIMIT_REACHED, 
-                f"{user.proactive_count_today}/{daily_max}"
+                f"{sent_today}/{daily_max}",
+                None
             )
         
         # ==========================================
         # GATE 3: PENDING QUESTIONS
         # ==========================================
-        pending_result = await self.db.execute(
-            select(Message.id)
-            .where(
-                Message.user_id == user_id,
-                Message.role == 'bot',
-                Message.is_question == True,
-                Message.question_answered == False
-            )
-            .limit(1)
-        )
-        
-        if pending_result.scalar_one_or_none():
-            return (False, BlockReason.PENDING_QUESTIONS, "unanswered_questions")
+        if has_pending:
+            return (False, BlockReason.PENDING_QUESTIONS, "unanswered_questions", None)
         
         # ==========================================
         # GATE 4: SPACE BOUNDARY (24-hour hard stop)
         # ==========================================
-        space_allowed, space_reason = await self.boundary_manager.check_space_allows_proactive(user_id)
-        
         if not space_allowed:
-            return (False, BlockReason.SPACE_BOUNDARY_HARD_STOP, space_reason)
+            return (False, BlockReason.SPACE_BOUNDARY_HARD_STOP, space_reason, None)
         
         # ==========================================
         # GATE 5: TIME OF DAY
         # ==========================================
-        user_tz = pytz.timezone(user.timezone or 'UTC')
+        user_tz = get_timezone(user.timezone or 'UTC')
         user_local_time = datetime.now(user_tz)
         hour = user_local_time.hour
         
         if hour >= LATE_NIGHT_START_HOUR or hour < LATE_NIGHT_END_HOUR:
-            return (False, BlockReason.LATE_NIGHT, f"hour={hour}")
+            return (False, BlockReason.LATE_NIGHT, f"hour={hour}", None)
         
         # ==========================================
         # GATE 6: TIMING BOUNDARIES
         # ==========================================
-        timing_boundaries = await self.boundary_manager.get_timing_boundaries(user_id)
-        
         if "no_morning_messages" in timing_boundaries and 6 <= hour < 12:
-            return (False, BlockReason.TIMING_BOUNDARY, "no_morning_messages")
+            return (False, BlockReason.TIMING_BOUNDARY, "no_morning_messages", None)
         
         if "no_late_messages" in timing_boundaries and hour >= 20:
-            return (False, BlockReason.TIMING_BOUNDARY, "no_late_messages")
+            return (False, BlockReason.TIMING_BOUNDARY, "no_late_messages", None)
         
         # ==========================================
         # GATE 7: ATTACHMENT PROBABILITY
@@ -177,16 +246,58 @@ class ProactiveScheduler:
         skip_prob = modifier['skip_probability']
         
         if skip_prob > 0 and random.random() < skip_prob:
-            return (False, BlockReason.ATTACHMENT_SKIPPED, f"skipped_{attachment}")
+            return (False, BlockReason.ATTACHMENT_SKIPPED, f"skipped_{attachment}", None)
         
         # All gates passed
-        return (True, None, None)
+        context = ProactiveContext(
+            user=user,
+            settings=settings,
+            attachment=attachment,
+            archetype=archetype,
+            modifier=modifier,
+            hour=hour,
+            msg_type=self._get_message_type(hour)
+        )
+        return (True, None, None, context)
     
-    async def generate(self, user_id: str) -> Dict[str, Any]:
+    async def _load_gate_state(
+        self,
+        user_id: str
+    ) -> Tuple[Optional[datetime], bool, bool, str, List[str]]:
+        """
+        Read the DB state for gates 1, 3, 4 and 6.
+        
+        The last send time and the pending-question check are folded into
+        one SELECT of two scalar subqueries.
+        """
+        has_pending = exists().where(
+            Message.user_id == user_id,
+            Message.role == 'bot',
+            Message.is_question == True,
+            Message.question_answered == False
+        )
+        
+        last_sent = (
+            select(func.max(ProactiveLog.sent_at))
+            .where(ProactiveLog.user_id == user_id)
+            .scalar_subquery()
+        )
+        result = await self.db.execute(select(last_sent, has_pending))
+        last_proactive, pending = result.one()
+        
+        space_allowed, space_reason = await self.boundary_manager.check_space_allows_proactive(user_id)
+        timing_boundaries = await self.boundary_manager.get_timing_boundaries(user_id)
+        
+        return last_proactive, bool(pending), space_allowed, space_reason, timing_boundaries
+    
+    async def generate(
+        self,
+        user_id: str
+    ) -> Dict[str, Any]:
         """Generate a proactive message if all gates pass."""
         
         # Pre-check gates
-        can_send, block_reason, details = await self.can_send(user_id)
+        can_send, block_reason, details, ctx = await self._can_send_core(user_id)
         
         if not can_send:
             logger.debug(f"Proactive BLOCKED {user_id}: {block_reason}")
@@ -208,30 +319,11 @@ class ProactiveScheduler:
                 "details": details
             }
         
-        # Get settings for context - prefer primary bot if multiple bots exist
-        settings_result = await self.db.execute(
-            select(BotSettings)
-            .where(BotSettings.user_id == user_id)
-            .order_by(BotSettings.is_primary.desc(), BotSettings.created_at.asc())
-        )
-        settings = settings_result.scalars().first()
-        
-        attachment = settings.attachment_style if settings else 'secure'
-        archetype = settings.archetype if settings else 'golden_retriever'
-        modifier = ATTACHMENT_MODIFIERS.get(
-            attachment, 
-            ATTACHMENT_MODIFIERS['secure']
-        )
-        
-        # Determine message type
-        user_result = await self.db.execute(
-            select(User.timezone).where(User.id == user_id)
-        )
-        user = user_result.scalar_one_or_none()
-        
-        user_tz = pytz.timezone(user or 'UTC')
-        hour = datetime.now(user_tz).hour
-        msg_type = self._get_message_type(hour)
+        # Reuse the state loaded by the gates
+        attachment = ctx.attachment
+        archetype = ctx.archetype
+        modifier = ctx.modifier
+        msg_type = ctx.msg_type
         
         # Try to use template first
         message = self._get_template_message(archetype, msg_type.value)
@@ -320,7 +412,8 @@ class ProactiveScheduler:
             "message": message,
             "message_type": msg_type.value,
             "archetype": archetype,
-            "attachment_style": attachment
+            "attachment_style": attachment,
+            "user": ctx.user
         }
     
     def _get_message_type(self, hour: int) -> ProactiveMessageType:
@@ -334,50 +427,59 @@ class ProactiveScheduler:
     
     def _get_template_message(self, archetype: str, msg_type: str) -> Optional[str]:
         """Get template message for archetype and time."""
-        templates = PROACTIVE_TEMPLATES.get(archetype, {})
-        msgs = templates.get(msg_type, [])
+        msgs = _TEMPLATE_TABLE.get((archetype, msg_type))
         return random.choice(msgs) if msgs else None
     
     def _is_no_send(self, message: str) -> bool:
         """Check if LLM returned NO_SEND signal."""
-        if not message:
-            return True
-        
-        message_lower = message.lower().strip()
-        return any(marker in message_lower for marker in ['[no_send]', 'no_send', 'dont send', "don't send"])
+        return not message or _NO_SEND_RE.search(message) is not None
     
     async def send_proactive_message(
         self, 
         user_id: str, 
         message: str,
         message_type: str,
-        archetype: str
+        archetype: str,
+        attachment_style: str = 'secure',
+        user: Optional[User] = None
     ) -> bool:
-        """Send proactive message and log."""
+        """
+        Send proactive message and log.
+        
+        Pass the ``user`` already loaded by generate() to skip re-selecting it.
+        """
         try:
-            # Get user
-            user_result = await self.db.execute(
-                select(User).where(User.id == user_id)
-            )
-            user = user_result.scalar_one_or_none()
+            if user is None:
+                user_result = await self.db.execute(
+                    select(User).where(User.id == user_id)
+                )
+                user = user_result.scalar_one_or_none()
             
             if not user:
                 logger.error(f"User {user_id} not found for proactive")
                 return False
             
             # Log the message to database
-            log = ProactiveLog(
-                user_id=user_id,
-                message_content=message,
-                message_category=f"{message_type}_{archetype}"
+            await self.db.execute(
+                insert(ProactiveLog).values(
+                    user_id=user_id,
+                    message_content=message,
+                    message_category=f"{message_type}_{archetype}"
+                )
             )
             
-            self.db.add(log)
-            
-            # Update user count
-            user.proactive_count_today += 1
+            # Update user count in the same transaction as the log, so every
+            # reader of proactive_count_today sees scheduler sends
+            await self.db.execute(
+                update(User)
+                .where(User.id == user_id)
+                .values(proactive_count_today=User.proactive_count_today + 1)
+            )
             
             await self.db.commit()
+            invalidate_user(user_id)
+            
+            await self._schedule_next_eligible(user_id, attachment_style)
             
             # Send to Telegram if user has telegram_id
             if user.telegram_id:
@@ -408,20 +510,126 @@ class ProactiveScheduler:
             await self.db.rollback()
             return False
 
+    async def process_due_user(self, user_id: str) -> bool:
+        """
+        Generate and send for a user taken off the due-set.
+        
+        Whenever nothing was sent the user is put back with schedule_retry(),
+        as the due-set is the only thing that wakes them again.
+        """
+        try:
+            result = await self.generate(user_id)
+            if result["success"] and await self.send_proactive_message(
+                user_id=user_id,
+                message=result["message"],
+                message_type=result["message_type"],
+                archetype=result["archetype"],
+                attachment_style=result["attachment_style"],
+                user=result["user"]
+            ):
+                return True
+            await self.schedule_retry(user_id, result.get("block_reason"))
+            return False
+        except Exception:
+            await self.schedule_retry(user_id, None)
+            raise
+    
+    async def _schedule_next_eligible(self, user_id: str, attachment_style: str) -> None:
+        """Record when the user's cooldown ends so they are checked again then."""
+        modifier = ATTACHMENT_MODIFIERS.get(attachment_style, ATTACHMENT_MODIFIERS['secure'])
+        await self._schedule_next_check(user_id, time.time() + modifier['cooldown_hours'] * 3600)
+    
+    async def schedule_retry(self, user_id: str, block_reason: Optional[BlockReason]) -> None:
+        """
+        Put a user that wasn't sent to back in the due-set.
+        
+        Users are taken off the due-set before generating, so a blocked
+        user is only checked again if it is re-added here. Cooldown, daily
+        limit and late-night blocks wait until that gate can pass; any other
+        outcome is retried after PROACTIVE_WORKER_INTERVAL_SECONDS.
+        """
+        now = time.time()
+        retry_at = now + PROACTIVE_WORKER_INTERVAL_SECONDS
+        try:
+            if block_reason in (BlockReason.LATE_NIGHT, BlockReason.DAILY_LIMIT_REACHED):
+                # Daily counts reset at local midnight, inside the late-night
+                # window, so both gates open again when that window ends
+                user = await self.db.get(User, user_id)
+                tz = get_timezone((user.timezone if user else None) or 'UTC')
+                local_now = datetime.now(tz)
+                wake = datetime.combine(local_now.date(), dt_time(LATE_NIGHT_END_HOUR), tzinfo=tz)
+                if wake <= local_now:
+                    wake = datetime.combine(
+                        local_now.date() + timedelta(days=1), dt_time(LATE_NIGHT_END_HOUR), tzinfo=tz
+                    )
+                retry_at = wake.timestamp()
+            elif block_reason == BlockReason.COOLDOWN_NOT_MET:
+                attachment = await self.db.scalar(
+                    select(BotSettings.attachment_style)
+                    .where(BotSettings.user_id == user_id)
+                    .order_by(BotSettings.is_primary.desc(), BotSettings.created_at.asc())
+                    .limit(1)
+                )
+                last_sent = await self.db.scalar(
+                    select(func.max(ProactiveLog.sent_at)).where(ProactiveLog.user_id == user_id)
+                )
+                if last_sent:
+                    modifier = ATTACHMENT_MODIFIERS.get(attachment, ATTACHMENT_MODIFIERS['secure'])
+                    # sent_at is naive UTC
+                    cooldown_end = (
+                        last_sent.replace(tzinfo=timezone.utc).timestamp()
+                        + modifier['cooldown_hours'] * 3600
+                    )
+                    retry_at = max(now, cooldown_end)
+        except Exception as e:
+            logger.warning(f"Failed to work out next proactive check for {user_id}: {e}")
+        
+        await self._schedule_next_check(user_id, retry_at)
+    
+    async def _schedule_next_check(self, user_id: str, when: float) -> None:
+        """Set the user's score in the due-set to the epoch time ``when``."""
+        try:
+            await _get_redis().zadd(
+                PROACTIVE_NEXT_KEY,
+                {str(user_id): when}
+            )
+        except Exception as e:
+            logger.warning(f"Failed to schedule next proactive for {user_id}: {e}")
+    
+    async def close(self) -> None:
+        """
+        Shut down the cached Telegram Bot clients.
+        
+        Not for schedulers given a shared ``bots`` dict; its owner closes it.
+        """
+        await _shutdown_bots(self._bots)
+
     async def _send_to_telegram(self, telegram_id: int, message: str, archetype: str = 'golden_retriever') -> bool:
         """Send a message to a Telegram user using the correct bot."""
         try:
             from telegram import Bot
             from telegram.request import HTTPXRequest
-            from constants import get_telegram_bot_token
+            from constants import get_telegram_bot_token, get_telegram_api_kwargs
 
-            token = get_telegram_bot_token(archetype)
-            if not token:
-                logger.error(f"No token found for archetype {archetype}")
-                return False
+            bot = self._bots.get(archetype)
+            if bot is None:
+                token = get_telegram_bot_token(archetype)
+                if not token:
+                    logger.error(f"No token found for archetype {archetype}")
+                    return False
+
+                # Sends are sequential, so the default one-connection pool will do
+                request = HTTPXRequest(connect_timeout=20.0, read_timeout=20.0, write_timeout=20.0)
+                bot = Bot(token=token, request=request, **get_telegram_api_kwargs())
+                # Bot.shutdown() only releases the connection pools of an
+                # initialized bot, so initialize before caching it
+                await bot.initialize()
+                cached = self._bots.setdefault(archetype, bot)
+                if cached is not bot:
+                    # Another send cached a bot for this archetype meanwhile
+                    await bot.shutdown()
+                    bot = cached
 
-            request = HTTPXRequest(connect_timeout=20.0, read_timeout=20.0, write_timeout=20.0)
-            bot = Bot(token=token, request=request)
             await bot.send_message(chat_id=telegram_id, text=message)
             logger.info(f"Sent Telegram proactive to {telegram_id} via {archetype} bot")
             return True
@@ -433,75 +641,116 @@ class ProactiveScheduler:
 
 class ProactiveWorker:
     """
-    Worker that runs proactive scheduler periodically.
+    Worker that sends proactive messages to users as they fall due.
+    
+    Each user's next check time is their score in the PROACTIVE_NEXT_KEY
+    sorted set. The worker takes due users off the set, runs the gates for
+    each on its own session, and then sleeps until the lowest remaining
+    score. Every PROACTIVE_WORKER_INTERVAL_SECONDS it also adds active users
+    missing from the set as due now, which seeds new users and recovers any
+    user whose check never finished.
     """
     
-    def __init__(
-        self,
-        db: AsyncSession,
-        context_builder_class,
-        llm_client,
-        boundary_manager,
-        analytics=None
-    ):
-        self.db = db
-        self.scheduler = ProactiveScheduler(
-            db=db,
-            context_builder_class=context_builder_class,
-            llm_client=llm_client,
-            boundary_manager=boundary_manager,
-            analytics=analytics
-        )
+    # Users added to the due-set per ZADD
+    BATCH_SIZE = 1000
+    
+    def __init__(self, session_factory: async_sessionmaker, context_builder_class, llm_client):
+        self.session_factory = session_factory
+        self.ContextBuilder = context_builder_class
+        self.llm = llm_client
+        # Telegram Bot clients shared by every scheduler this worker builds
+        self._bots: Dict[str, Any] = {}
+        self._stop_event = asyncio.Event()
         self.running = False
     
     async def run(self):
         """Main worker loop."""
         self.running = True
+        self._stop_event.clear()
         
         logger.info("[ProactiveWorker] Starting proactive worker")
         
-        while self.running:
-            try:
-                await self._process_cycle()
-            except Exception as e:
-                logger.error(f"[ProactiveWorker] Cycle error: {e}", exc_info=True)
-            
-            await asyncio.sleep(PROACTIVE_WORKER_INTERVAL_SECONDS)
+        next_reconcile = 0.0
+        try:
+            while self.running:
+                try:
+                    if time.time() >= next_reconcile:
+                        await self._reconcile()
+                        next_reconcile = time.time() + PROACTIVE_WORKER_INTERVAL_SECONDS
+                    await self._process_due()
+                    wake_at = await self._next_due_time()
+                    timeout = min(wake_at or next_reconcile, next_reconcile) - time.time()
+                except Exception as e:
+                    logger.error(f"[ProactiveWorker] Cycle error: {e}", exc_info=True)
+                    timeout = PROACTIVE_DUE_CHECK_SECONDS
+                
+                # Sleep until the next user is due, waking immediately on stop()
+                try:
+                    await asyncio.wait_for(self._stop_event.wait(), timeout=max(timeout, 0))
+                    break
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            await _shutdown_bots(self._bots)
     
-    async def _process_cycle(self):
-        """Process one proactive cycle."""
-        # Get all active users
-        from models.sql_models import User
-        
-        users_result = await self.db.execute(
-            select(User.id, User.is_active_today, User.proactive_count_today)
-            .where(User.is_active == True)
-            .limit(100)  # Process 100 users per cycle
-        )
-        users = users_result.fetchall()
-        
-        for user_id, is_active_today, proactive_count_today in users:
+    async def _process_due(self):
+        """Take every due user off the due-set and process them in turn."""
+        pipe = _get_redis().pipeline()
+        now = time.time()
+        # Read and remove in one transaction so another consumer of the
+        # due-set (the Celery due-check task) can't take the same users
+        pipe.zrangebyscore(PROACTIVE_NEXT_KEY, 0, now)
+        pipe.zremrangebyscore(PROACTIVE_NEXT_KEY, 0, now)
+        due, _ = await pipe.execute()
+        
+        for member in due:
+            if not self.running:
+                # Left out of the due-set; the next start's reconcile re-adds them
+                break
+            user_id = UUID(member.decode())
             try:
-                # Generate proactive message
-                result = await self.scheduler.generate(user_id)
-                
-                if result["success"]:
-                    # Send the message
-                    success = await self.scheduler.send_proactive_message(
-                        user_id=user_id,
-                        message=result["message"],
-                        message_type=result["message_type"],
-                        archetype=result["archetype"]
+                async with self.session_factory() as db:
+                    scheduler = ProactiveScheduler(
+                        db=db,
+                        context_builder_class=self.ContextBuilder,
+                        llm_client=self.llm,
+                        boundary_manager=BoundaryManager(db),
+                        analytics=Analytics(db),
+                        bots=self._bots
                     )
-                    
-                    if success:
+                    if await scheduler.process_due_user(user_id):
                         logger.info(f"[ProactiveWorker] Sent proactive to {user_id}")
-                    else:
-                        logger.warning(f"[ProactiveWorker] Failed to send proactive to {user_id}")
-                
             except Exception as e:
                 logger.error(f"[ProactiveWorker] Error for user {user_id}: {e}")
     
+    async def _next_due_time(self) -> Optional[float]:
+        """Epoch time of the lowest score in the due-set, or None if it is empty."""
+        lowest = await _get_redis().zrange(PROACTIVE_NEXT_KEY, 0, 0, withscores=True)
+        return lowest[0][1] if lowest else None
+    
+    async def _reconcile(self):
+        """Add every active user that isn't in the due-set yet."""
+        async with self.session_factory() as db:
+            users_result = await db.execute(
+                select(User.id).where(User.is_active == True)
+            )
+            user_ids = users_result.scalars().all()
+        
+        redis = _get_redis()
+        now = time.time()
+        added = 0
+        for i in range(0, len(user_ids), self.BATCH_SIZE):
+            batch = user_ids[i:i + self.BATCH_SIZE]
+            added += await redis.zadd(
+                PROACTIVE_NEXT_KEY,
+                {str(user_id): now for user_id in batch},
+                nx=True
+            )
+        
+        if added:
+            logger.info(f"[ProactiveWorker] Added {added} user(s) to the proactive due-set")
+    
     def stop(self):
         """Stop the worker."""
-        self.running = False
\ No newline at end of file
+        self.running = False
+        self._stop_event.set()
@@ -3,28 +3,61 @@ Question tracking service - FIXED for SQLAlchemy
 """
 import logging
 import re
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
+from sqlalchemy import select, update, exists
 
 logger = logging.getLogger(__name__)
 
+QUESTION_PATTERNS = [
+    r"(\?[^.!?]*$)",  # Ends with question mark
+    r"(what's|what is|how do|how to|why do|why does|where is|when is)",
+    r"(are you|do you|can you|will you|would you|have you)",
+    r"(right\?|correct\?|yes\?|no\?)",
+]
+# Every pattern without a '?' contains one of these substrings
+QUESTION_ANCHORS = ('you', 'how', 'what', 'why', 'when', 'where')
+_QUESTION_RE = re.compile('|'.join(QUESTION_PATTERNS))
+
+
+def _is_question(message: str) -> bool:
+    """Check if message contains a question."""
+    if not message:
+        return False
+    
+    # Check for question mark
+    if '?' in message:
+        return True
+    
+    # Cheap substring scan before falling through to the regex
+    message_lower = message.lower()
+    if not any(anchor in message_lower for anchor in QUESTION_ANCHORS):
+        return False
+    
+    return _QUESTION_RE.search(message_lower) is not None
+
 
 class QuestionTracker:
     """Tracks questions asked by the bot."""
     
-    QUESTION_PATTERNS = [
-        r"(\?[^.!?]*$)",  # Ends with question mark
-        r"(what's|what is|how do|how to|why do|why does|where is|when is)",
-        r"(are you|do you|can you|will you|would you|have you)",
-        r"(right\?|correct\?|yes\?|no\?)",
-    ]
+    QUESTION_PATTERNS = QUESTION_PATTERNS
     
     def __init__(self, db: AsyncSession):
         self.db = db
     
+    def analyze_bot_message(self, message: str) -> Tuple[bool, Optional[str]]:
+        """Return (is_question, question_topic) so callers can set them on INSERT."""
+        is_question = self._contains_question(message)
+        topic = self._extract_topic(message) if is_question else None
+        return is_question, topic
+    
     async def on_bot_message(self, user_id: str, message: str, message_id: str):
-        """Analyze bot message for questions - FIXED."""
+        """
+        Analyze an already-stored bot message for questions - FIXED.
+        
+        Prefer analyze_bot_message() and setting the columns when the
+        message is inserted; this issues a separate UPDATE.
+        """
         from models.sql_models import Message
         from uuid import UUID
         
@@ -33,12 +66,7 @@ class QuestionTracker:
             msg_uuid = UUID(message_id) if isinstance(message_id, str) else message_id
             
             # Check if message contains a question
-            is_question = self._contains_question(message)
-            
-            # Extract topic if it's a question
-            topic = None
-            if is_question:
-                topic = self._extract_topic(message)
+            is_question, topic = self.analyze_bot_message(message)
             
             # Update the message
             stmt = update(Message).where(
@@ -112,20 +140,7 @@ class QuestionTracker:
     
     def _contains_question(self, message: str) -> bool:
         """Check if message contains a question."""
-        if not message:
-            return False
-        
-        # Check for question mark
-        if '?' in message:
-            return True
-        
-        # Check for question patterns
-        message_lower = message.lower()
-        for pattern in self.QUESTION_PATTERNS:
-            if re.search(pattern, message_lower):
-                return True
-        
-        return False
+        return _is_question(message)
     
     def _extract_topic(self, message: str) -> Optional[str]:
         """Extract topic from question."""
@@ -160,15 +175,15 @@ class QuestionTracker:
         try:
             user_uuid = UUID(user_id) if isinstance(user_id, str) else user_id
             
-            stmt = select(Message.id).where(
+            stmt = select(exists().where(
                 Message.user_id == user_uuid,
                 Message.role == 'bot',
                 Message.is_question == True,
                 Message.question_answered == False
-            ).limit(1)
+            ))
             
             result = await self.db.execute(stmt)
-            pending = result.scalar_one_or_none() is not None
+            pending = bool(result.scalar())
             
             return pending
             
@@ -179,27 +194,9 @@ class QuestionTracker:
 class QuestionDetector:
     """Detects if a message is a question."""
     
-    QUESTION_PATTERNS = [
-        r"(\?[^.!?]*$)",  # Ends with question mark
-        r"(what's|what is|how do|how to|why do|why does|where is|when is)",
-        r"(are you|do you|can you|will you|would you|have you)",
-        r"(right\?|correct\?|yes\?|no\?)",
-    ]
+    QUESTION_PATTERNS = QUESTION_PATTERNS
     
     @classmethod
     def is_question(cls, message: str) -> bool:
         """Determine if the message is a question."""
-        if not message:
-            return False
-        
-        # Check for question mark
-        if '?' in message:
-            return True
-        
-        # Check for question patterns
-        message_lower = message.lower()
-        for pattern in cls.QUESTION_PATTERNS:
-            if re.search(pattern, message_lower):
-                return True
-        
-        return False
\ No newline at end of file
+        return _is_question(message)
\ No newline at end of file
@@ -7,7 +7,8 @@ from .jobs import (
     run_daily_reset,
     run_memory_summarization,
     run_data_cleanup,
-    run_proactive_scheduler
+    run_due_proactive,
+    generate_proactive_for_user
 )
 
 __all__ = [
@@ -15,5 +16,6 @@ __all__ = [
     "run_daily_reset",
     "run_memory_summarization", 
     "run_data_cleanup",
-    "run_proactive_scheduler",
+    "run_due_proactive",
+    "generate_proactive_for_user",
 ]
\ No newline at end of file
@@ -2,6 +2,8 @@
 from celery import Celery
 import os
 
+from constants import PROACTIVE_DUE_CHECK_SECONDS
+
 # Create Celery instance
 celery_app = Celery(
     'companion_bot',
@@ -33,9 +35,9 @@ celery_app.conf.update(
             'task': 'tasks.jobs.run_data_cleanup',
             'schedule': 3600.0,  # Every hour
         },
-        'proactive-messages': {
-            'task': 'tasks.jobs.run_proactive_scheduler',
-            'schedule': 900.0,  # Every 15 minutes
+        'proactive-due-users': {
+            'task': 'tasks.jobs.run_due_proactive',
+            'schedule': float(PROACTIVE_DUE_CHECK_SECONDS),  # Only users whose cooldown ended
         },
     }
 )
\ No newline at end of file
@@ -27,8 +27,60 @@ def run_data_cleanup():
     logger.info("Running data cleanup job")
 
 @shared_task
-def run_proactive_scheduler():
-    """Run proactive message scheduler."""
-    from backend_services_v31.services.proactive_scheduler import ProactiveWorker
-    # Implementation here
-    logger.info("Running proactive scheduler job")
\ No newline at end of file
+def run_due_proactive():
+    """
+    Enqueue proactive generation for users whose cooldown has ended.
+    
+    An alternative to the in-process ProactiveWorker for deployments that
+    run Celery beat and a worker on the jobs queue; both take users off the
+    due-set atomically, so running both never sends twice.
+    """
+    import time
+    import redis
+    from constants import REDIS_URL, PROACTIVE_NEXT_KEY
+
+    client = redis.Redis.from_url(REDIS_URL)
+    now = time.time()
+
+    # Read and remove due members atomically so overlapping beats don't double-enqueue
+    pipe = client.pipeline()
+    pipe.zrangebyscore(PROACTIVE_NEXT_KEY, 0, now)
+    pipe.zremrangebyscore(PROACTIVE_NEXT_KEY, 0, now)
+    due, _ = pipe.execute()
+
+    for user_id in due:
+        generate_proactive_for_user.delay(user_id.decode())
+
+    logger.info(f"Enqueued proactive generation for {len(due)} due user(s)")
+
+@shared_task
+def generate_proactive_for_user(user_id: str):
+    """Generate and send a proactive message for a single user."""
+    import asyncio
+    from uuid import UUID
+    from database import AsyncSessionLocal
+    from services.analytics import Analytics
+    from services.boundary_manager import BoundaryManager
+    from services.context_builder import ContextBuilder
+    from services.llm_client import OpenAILLMClient
+    from services.proactive_scheduler import ProactiveScheduler
+
+    async def _generate():
+        uid = UUID(user_id)
+        llm_client = OpenAILLMClient()
+        async with AsyncSessionLocal() as db:
+            scheduler = ProactiveScheduler(
+                db=db,
+                context_builder_class=ContextBuilder,
+                llm_client=llm_client,
+                boundary_manager=BoundaryManager(db),
+                analytics=Analytics(db)
+            )
+            try:
+                await scheduler.process_due_user(uid)
+            finally:
+                # The clients are bound to this task's event loop
+                await scheduler.close()
+                await llm_client.client.close()
+
+    asyncio.run(_generate())
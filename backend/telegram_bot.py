@@ -4,21 +4,37 @@ Telegram bot integration for AI Companion Bot v3.1 - Multi-Bot Support
 Each persona has its own Telegram bot and token
 """
 import os
+import hmac
 import logging
 import asyncio
+import secrets
+import traceback
 from typing import Optional, Dict, Any
 from dotenv import load_dotenv
+from constants import (
+    TELEGRAM_BOTS,
+    TELEGRAM_BOT_TOKENS,
+    TELEGRAM_POOL_SIZE,
+    TELEGRAM_POOL_TIMEOUT,
+    WEBHOOK_BASE_URL,
+    WEBHOOK_PORT,
+    WEBHOOK_SECRET,
+    get_telegram_api_kwargs,
+    get_telegram_bot_token
+)
 
 # Try to import Telegram libraries
 try:
     from telegram import Update, Bot
+    from telegram.constants import ChatAction, ParseMode
     from telegram.ext import (
         Application, 
         CommandHandler, 
         MessageHandler, 
         filters, 
         CallbackContext,
-        ApplicationBuilder
+        ApplicationBuilder,
+        AIORateLimiter
     )
     from telegram.error import TelegramError
     TELEGRAM_AVAILABLE = True
@@ -30,6 +46,12 @@ load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Slash commands forwarded to the command handler
+COMMANDS = ("start", "support", "settings", "personality", "summary", "forget", "boundaries", "reset", "schedule", "help")
+
+# Per-chat workers exit after this long without new updates
+CHAT_WORKER_IDLE_SECONDS = 60
+
 class TelegramBot:
     """Telegram bot handler for AI Companion Bot - Multi-Bot Support."""
     
@@ -52,7 +74,6 @@ class TelegramBot:
             self.token = token
         else:
             # Try to get archetype-specific token
-            from constants import get_telegram_bot_token
             self.token = get_telegram_bot_token(self.archetype)
         
         if not self.token:
@@ -63,34 +84,59 @@ class TelegramBot:
         self.application = None
         self.bot = None
         
+        # One queue + worker per user: updates from the same chat run in order,
+        # different chats run concurrently
+        self._chat_queues: Dict[int, asyncio.Queue] = {}
+        self._chat_workers: Dict[int, asyncio.Task] = {}
+        
+        # Set by stop(); start_polling parks on it instead of a sleep loop
+        self._stop_event = asyncio.Event()
+        
     async def initialize(self):
         """Initialize Telegram bot application."""
         try:
             # Create application with proper async settings
-            self.application = (
+            builder = (
                 ApplicationBuilder()
                 .token(self.token)
                 .job_queue(None)
                 .concurrent_updates(True)
-                .pool_timeout(30)
+                .connection_pool_size(TELEGRAM_POOL_SIZE)
+                .pool_timeout(TELEGRAM_POOL_TIMEOUT)
+                .get_updates_connection_pool_size(1)
+                .get_updates_pool_timeout(60)
                 .connect_timeout(30)
                 .read_timeout(30)
                 .write_timeout(30)
-                .build()
             )
+            
+            # Talk to a self-hosted Bot API server when one is configured
+            local_api = get_telegram_api_kwargs()
+            if local_api:
+                builder = (
+                    builder
+                    .base_url(local_api['base_url'])
+                    .base_file_url(local_api['base_file_url'])
+                    .local_mode(True)
+                )
+            
+            # Throttle outbound calls to Telegram's limits instead of hitting 429s
+            try:
+                builder = builder.rate_limiter(AIORateLimiter(
+                    overall_max_rate=30,
+                    overall_time_period=1,
+                    group_max_rate=20,
+                    group_time_period=60
+                ))
+            except RuntimeError as e:
+                # AIORateLimiter needs the python-telegram-bot[rate-limiter] extra
+                logger.warning(f"Telegram bot [{self.archetype}] running without rate limiter: {e}")
+            
+            self.application = builder.build()
             self.bot = self.application.bot
             
             # Add handlers
-            self.application.add_handler(CommandHandler("start", self.handle_command))
-            self.application.add_handler(CommandHandler("support", self.handle_command))
-            self.application.add_handler(CommandHandler("settings", self.handle_command))
-            self.application.add_handler(CommandHandler("personality", self.handle_command))
-            self.application.add_handler(CommandHandler("summary", self.handle_command))
-            self.application.add_handler(CommandHandler("forget", self.handle_command))
-            self.application.add_handler(CommandHandler("boundaries", self.handle_command))
-            self.application.add_handler(CommandHandler("reset", self.handle_command))
-            self.application.add_handler(CommandHandler("schedule", self.handle_command))
-            self.application.add_handler(CommandHandler("help", self.handle_command))
+            self.application.add_handler(CommandHandler(list(COMMANDS), self.handle_command))
             
             # Add message handler
             self.application.add_handler(
@@ -105,15 +151,56 @@ class TelegramBot:
             
         except Exception as e:
             logger.error(f"Failed to initialize Telegram bot [{self.archetype}]: {e}")
-            import traceback
             logger.error(traceback.format_exc())
             return False
     
     async def handle_message(self, update: Update, context: CallbackContext):
+        """Queue incoming message on the sender's chat worker."""
+        if update.effective_user is None:
+            return
+        self._enqueue(update.effective_user.id, self._process_message, update, context)
+    
+    async def handle_command(self, update: Update, context: CallbackContext):
+        """Queue incoming command on the sender's chat worker."""
+        if update.effective_user is None:
+            return
+        self._enqueue(update.effective_user.id, self._process_command, update, context)
+    
+    def _enqueue(self, telegram_id: int, handler, update: Update, context: CallbackContext):
+        """Add an update to the user's queue, starting a worker if none is running."""
+        queue = self._chat_queues.get(telegram_id)
+        if queue is None:
+            queue = self._chat_queues[telegram_id] = asyncio.Queue()
+        queue.put_nowait((handler, update, context))
+        
+        if telegram_id not in self._chat_workers:
+            self._chat_workers[telegram_id] = asyncio.create_task(self._drain_chat(telegram_id, queue))
+    
+    async def _drain_chat(self, telegram_id: int, queue: asyncio.Queue):
+        """Process one user's updates sequentially; exit once the queue stays idle."""
+        try:
+            while True:
+                try:
+                    handler, update, context = await asyncio.wait_for(queue.get(), timeout=CHAT_WORKER_IDLE_SECONDS)
+                except asyncio.TimeoutError:
+                    if queue.empty():
+                        return
+                    continue
+                
+                try:
+                    await handler(update, context)
+                except Exception as e:
+                    logger.error(f"[{self.archetype}] Unhandled error in chat worker for {telegram_id}: {e}")
+        finally:
+            self._chat_queues.pop(telegram_id, None)
+            self._chat_workers.pop(telegram_id, None)
+    
+    async def _process_message(self, update: Update, context: CallbackContext):
         """Handle incoming message with archetype context."""
+        msg = update.message
         try:
             telegram_id = update.effective_user.id
-            message_text = update.message.text
+            message_text = msg.text
             
             if not message_text:
                 return
@@ -121,7 +208,7 @@ class TelegramBot:
             logger.info(f"[{self.archetype}] Received message from {telegram_id}: {message_text[:50]}...")
             
             # Send typing action
-            await update.message.chat.send_action(action="typing")
+            await msg.chat.send_action(action=ChatAction.TYPING)
             
             # Pass archetype context to message handler
             response = await self.message_handler.handle(
@@ -131,28 +218,29 @@ class TelegramBot:
             )
             
             if response:
-                await update.message.reply_text(response, parse_mode='Markdown')
+                await msg.reply_text(response, parse_mode=ParseMode.MARKDOWN)
                 
         except Exception as e:
             logger.error(f"[{self.archetype}] Error handling message: {e}")
-            import traceback
             logger.error(traceback.format_exc())
             try:
-                await update.message.reply_text("Oops, something went wrong. Try again?")
-            except:
-                pass
+                await msg.reply_text("Oops, something went wrong. Try again?")
+            except TelegramError as reply_error:
+                logger.debug(f"[{self.archetype}] Error reply failed: {reply_error}")
     
-    async def handle_command(self, update: Update, context: CallbackContext):
+    async def _process_command(self, update: Update, context: CallbackContext):
         """Handle command with archetype context."""
+        msg = update.message
         try:
             telegram_id = update.effective_user.id
-            command = update.message.text.split()[0][1:]  # Remove leading slash
-            args = update.message.text[len(command)+2:] if len(update.message.text.split()) > 1 else ""
+            parts = msg.text.split(maxsplit=1)
+            command = parts[0][1:].split("@", 1)[0]  # Remove leading slash and @botname suffix
+            args = parts[1] if len(parts) > 1 else ""
             
             logger.info(f"[{self.archetype}] Received command from {telegram_id}: /{command} {args}")
             
             # Send typing action
-            await update.message.chat.send_action(action="typing")
+            await msg.chat.send_action(action=ChatAction.TYPING)
             
             # Pass archetype context to command handler
             response = await self.command_handler.handle(
@@ -163,16 +251,15 @@ class TelegramBot:
             )
             
             if response:
-                await update.message.reply_text(response, parse_mode='Markdown')
+                await msg.reply_text(response, parse_mode=ParseMode.MARKDOWN)
                 
         except Exception as e:
             logger.error(f"[{self.archetype}] Error handling command: {e}")
-            import traceback
             logger.error(traceback.format_exc())
             try:
-                await update.message.reply_text("Oops, something went wrong. Try again?")
-            except:
-                pass
+                await msg.reply_text("Oops, something went wrong. Try again?")
+            except TelegramError as reply_error:
+                logger.debug(f"[{self.archetype}] Error reply failed: {reply_error}")
     
     async def start_polling(self):
         """Start polling for updates, retrying on network/timeout errors."""
@@ -188,6 +275,9 @@ class TelegramBot:
             try:
                 await self.application.initialize()
                 await self.application.start()
+                # Retries in this loop only happen before polling has started,
+                # so nothing has been dropped yet; once running, PTB's updater
+                # rides out network errors itself without dropping updates
                 await self.application.updater.start_polling(
                     poll_interval=0.5,
                     drop_pending_updates=True,
@@ -197,8 +287,8 @@ class TelegramBot:
 
                 logger.info(f"Telegram bot [{self.archetype}] is now polling for updates")
 
-                while True:
-                    await asyncio.sleep(1)
+                await self._stop_event.wait()
+                return
 
             except asyncio.CancelledError:
                 logger.info(f"Telegram bot [{self.archetype}] polling cancelled")
@@ -212,16 +302,45 @@ class TelegramBot:
                     await asyncio.sleep(retry_delay)
                 else:
                     logger.error(f"Error in Telegram bot [{self.archetype}] polling: {e}")
-                    import traceback
                     logger.error(traceback.format_exc())
                     raise
     
+    async def start_webhook(self, webhook_url: str, secret_token: str):
+        """Start the application without an updater and register the webhook.
+        
+        Updates are fed in by TelegramBotManager's shared webhook server
+        through process_webhook_update().
+        """
+        if not self.application:
+            await self.initialize()
+        
+        await self.application.initialize()
+        await self.application.start()
+        await self.bot.set_webhook(
+            url=webhook_url,
+            secret_token=secret_token,
+            allowed_updates=Update.ALL_TYPES,
+            drop_pending_updates=True
+        )
+        
+        logger.info(f"Telegram bot [{self.archetype}] is now receiving updates via webhook")
+    
+    async def process_webhook_update(self, data: Dict[str, Any]):
+        """Queue an update received on the webhook for the application."""
+        update = Update.de_json(data, self.bot)
+        await self.application.update_queue.put(update)
+    
     async def stop(self):
         """Stop the bot gracefully."""
+        self._stop_event.set()
+        
         if self.application:
             try:
                 logger.info(f"Stopping Telegram bot [{self.archetype}]...")
                 
+                for worker in list(self._chat_workers.values()):
+                    worker.cancel()
+                
                 if self.application.updater.running:
                     await self.application.updater.stop()
                 
@@ -238,7 +357,7 @@ class TelegramBot:
             await self.bot.send_message(
                 chat_id=telegram_id, 
                 text=message,
-                parse_mode='Markdown'
+                parse_mode=ParseMode.MARKDOWN
             )
             logger.info(f"[{self.archetype}] Sent message to {telegram_id}: {message[:50]}...")
             return True
@@ -264,38 +383,52 @@ class TelegramBotManager:
         self.command_handler = command_handler
         self.bots: Dict[str, TelegramBot] = {}
         self.tasks: Dict[str, asyncio.Task] = {}
+        self._web_runner = None  # aiohttp AppRunner when running in webhook mode
+        self._webhook_secret = WEBHOOK_SECRET
     
     async def initialize_all(self):
-        """Initialize all persona bots."""
-        from constants import TELEGRAM_BOTS, TELEGRAM_BOT_TOKENS
+        """Initialize all persona bots concurrently."""
+        archetypes = list(TELEGRAM_BOTS.keys())
+        results = await asyncio.gather(
+            *(self._init_one(archetype) for archetype in archetypes),
+            return_exceptions=True
+        )
         
-        for archetype in TELEGRAM_BOTS.keys():
-            try:
-                bot = TelegramBot(
-                    self.message_handler,
-                    self.command_handler,
-                    archetype=archetype
-                )
-                
-                # Only initialize if token is available
-                token = TELEGRAM_BOT_TOKENS.get(archetype, '') or os.getenv('TELEGRAM_BOT_TOKEN', '')
-                if token:
-                    success = await bot.initialize()
-                    if success:
-                        self.bots[archetype] = bot
-                        logger.info(f"Bot manager: Initialized {archetype} bot")
-                    else:
-                        logger.warning(f"Bot manager: Failed to initialize {archetype} bot")
-                else:
-                    logger.warning(f"Bot manager: No token found for {archetype} bot")
-                    
-            except Exception as e:
-                logger.error(f"Bot manager: Error initializing {archetype} bot: {e}")
+        for archetype, bot in zip(archetypes, results):
+            if isinstance(bot, Exception):
+                logger.error(f"Bot manager: Error initializing {archetype} bot: {bot}")
+            elif bot:
+                self.bots[archetype] = bot
+    
+    async def _init_one(self, archetype: str) -> Optional[TelegramBot]:
+        """Build and initialize one persona bot; None if it has no token or fails."""
+        bot = TelegramBot(
+            self.message_handler,
+            self.command_handler,
+            archetype=archetype
+        )
+        
+        # Only initialize if token is available
+        token = TELEGRAM_BOT_TOKENS.get(archetype, '') or os.getenv('TELEGRAM_BOT_TOKEN', '')
+        if not token:
+            logger.warning(f"Bot manager: No token found for {archetype} bot")
+            return None
+        
+        if not await bot.initialize():
+            logger.warning(f"Bot manager: Failed to initialize {archetype} bot")
+            return None
+        
+        logger.info(f"Bot manager: Initialized {archetype} bot")
+        return bot
     
     async def start_all(self):
-        """Start polling for all bot instances."""
+        """Start receiving updates for all bot instances."""
         logger.info(f"Bot manager: Starting {len(self.bots)} bot instances...")
         
+        if WEBHOOK_BASE_URL:
+            await self._start_webhook_server()
+            return
+        
         for archetype, bot in self.bots.items():
             try:
                 task = asyncio.create_task(bot.start_polling())
@@ -304,10 +437,67 @@ class TelegramBotManager:
             except Exception as e:
                 logger.error(f"Bot manager: Error starting {archetype} bot: {e}")
     
+    async def _start_webhook_server(self):
+        """Serve every persona's webhook from one aiohttp server."""
+        from aiohttp import web
+        
+        web_app = web.Application()
+        
+        # Telegram sends the secret with every update; without one, anyone who
+        # knows the URL could post forged updates
+        if not self._webhook_secret:
+            self._webhook_secret = secrets.token_urlsafe(32)
+            logger.warning(
+                "Bot manager: WEBHOOK_SECRET is not set, using a secret generated for this process. "
+                "Set WEBHOOK_SECRET when more than one process registers the webhooks."
+            )
+        
+        # getMe + setWebhook for every persona in parallel
+        results = await asyncio.gather(
+            *(bot.start_webhook(f"{WEBHOOK_BASE_URL}/{archetype}", self._webhook_secret) for archetype, bot in self.bots.items()),
+            return_exceptions=True
+        )
+        
+        for (archetype, bot), result in zip(self.bots.items(), results):
+            if isinstance(result, Exception):
+                logger.error(f"Bot manager: Error starting {archetype} bot webhook: {result}")
+                continue
+            web_app.router.add_post(f"/{archetype}", self._make_webhook_handler(bot))
+            logger.info(f"Bot manager: Registered {archetype} bot webhook")
+        
+        self._web_runner = web.AppRunner(web_app)
+        await self._web_runner.setup()
+        await web.TCPSite(self._web_runner, "0.0.0.0", WEBHOOK_PORT).start()
+        
+        logger.info(f"Bot manager: Webhook server listening on port {WEBHOOK_PORT}")
+    
+    def _make_webhook_handler(self, bot: TelegramBot):
+        """Build the aiohttp request handler for one persona bot."""
+        from aiohttp import web
+        
+        async def handle(request):
+            token = request.headers.get("X-Telegram-Bot-Api-Secret-Token", "")
+            if not hmac.compare_digest(token.encode(), self._webhook_secret.encode()):
+                return web.Response(status=403)
+            try:
+                await bot.process_webhook_update(await request.json())
+            except Exception as e:
+                logger.error(f"[{bot.archetype}] Error processing webhook update: {e}")
+            return web.Response()
+        
+        return handle
+    
     async def stop_all(self):
         """Stop all bot instances."""
         logger.info(f"Bot manager: Stopping all {len(self.bots)} bot instances...")
         
+        if self._web_runner:
+            try:
+                await self._web_runner.cleanup()
+            except Exception as e:
+                logger.error(f"Bot manager: Error stopping webhook server: {e}")
+            self._web_runner = None
+        
         for archetype, bot in self.bots.items():
             try:
                 await bot.stop()
@@ -360,4 +550,11 @@ if __name__ == "__main__":
         await manager.initialize_all()
         await manager.start_all()
     
+    # Prefer libuv's event loop when available
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+    
     asyncio.run(main())
@@ -4,11 +4,16 @@ Test to trace what happens when user sends:
 "my meeting is about to start in 1 minute and it will last long for 1 minute"
 """
 import asyncio
-from datetime import datetime, timedelta
-import pytz
+import os
+import sys
+from datetime import datetime, timedelta, timezone
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 import uuid
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.timezone import get_timezone, to_utc_batch
+
 # Mock setup
 class MockUser:
     def __init__(self):
@@ -45,10 +50,10 @@ def test_meeting_extraction_scenario():
     print(f"   - Uses user's timezone as reference ({user.timezone})")
     
     # Get user's current time in their timezone
-    user_tz = pytz.timezone(user.timezone)
-    utc_now = datetime.utcnow()
-    user_now_aware = utc_now.replace(tzinfo=pytz.UTC).astimezone(user_tz)
-    user_now = user_now_aware.replace(tzinfo=None)
+    user_tz = get_timezone(user.timezone)
+    now = datetime.now(timezone.utc)
+    utc_now = now.replace(tzinfo=None)  # naive UTC, like the stored schedule times
+    user_now = now.astimezone(user_tz).replace(tzinfo=None)
     
     print(f"\n   Current UTC time: {utc_now.strftime('%Y-%m-%d %H:%M:%S')} UTC")
     print(f"   Current user time: {user_now.strftime('%Y-%m-%d %H:%M:%S')} {user.timezone}")
@@ -68,12 +73,8 @@ def test_meeting_extraction_scenario():
     # Convert to UTC for storage
     print(f"\n🗄️  STEP 3: Convert to UTC for Database Storage")
     
-    # Localize to user's timezone, then convert to UTC
-    start_aware = user_tz.localize(extracted_start)
-    start_utc = start_aware.astimezone(pytz.UTC).replace(tzinfo=None)
-    
-    end_aware = user_tz.localize(extracted_end)
-    end_utc = end_aware.astimezone(pytz.UTC).replace(tzinfo=None)
+    # Localize to user's timezone, then convert to UTC (same helper as message_analyzer)
+    start_utc, end_utc = to_utc_batch((extracted_start, extracted_end), user.timezone)
     
     print(f"   Converted start time (UTC): {start_utc.strftime('%Y-%m-%d %H:%M:%S')} UTC")
     print(f"   Converted end time (UTC):   {end_utc.strftime('%Y-%m-%d %H:%M:%S')} UTC")
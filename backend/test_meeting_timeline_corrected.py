@@ -7,8 +7,19 @@ Expected behavior:
 - T+7: Completion message (meeting ends at T+4, +5 min delay = T+9, but sent at next check ~T+7 or T+8)
 """
 
-from datetime import datetime, timedelta
-import pytz
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.timezone import get_timezone
+
+
+def _hms(dt):
+    """Format as HH:MM:SS (same output as strftime('%H:%M:%S'))."""
+    return dt.time().isoformat(timespec='seconds')
+
 
 def test_corrected_meeting_timeline():
     """Test the corrected meeting timeline with FOLLOWUP_DELAY."""
@@ -19,30 +30,31 @@ def test_corrected_meeting_timeline():
     
     # Setup
     user_tz = "America/New_York"
-    utc_now = datetime.utcnow()
-    user_now = utc_now.replace(tzinfo=pytz.UTC).astimezone(pytz.timezone(user_tz)).replace(tzinfo=None)
+    now = datetime.now(timezone.utc)
+    utc_now = now.replace(tzinfo=None)  # naive UTC, like the stored schedule times
+    user_now = now.astimezone(get_timezone(user_tz)).replace(tzinfo=None)
     
     print(f"\n📱 USER SENDS MESSAGE:")
     print(f"   Message: 'meeting is about to start in 2 minutes that will last long for 2 minutes'")
-    print(f"   Current time: {utc_now.strftime('%H:%M:%S')} UTC | {user_now.strftime('%H:%M:%S')} {user_tz}")
+    print(f"   Current time: {_hms(utc_now)} UTC | {_hms(user_now)} {user_tz}")
     
     # Extract times
     meeting_start = user_now + timedelta(minutes=2)
     meeting_end = user_now + timedelta(minutes=4)
     
     # Convert to UTC
-    user_tz_obj = pytz.timezone(user_tz)
-    start_aware = user_tz_obj.localize(meeting_start)
-    start_utc = start_aware.astimezone(pytz.UTC).replace(tzinfo=None)
+    user_tz_obj = get_timezone(user_tz)
+    start_aware = meeting_start.replace(tzinfo=user_tz_obj)
+    start_utc = start_aware.astimezone(timezone.utc).replace(tzinfo=None)
     
-    end_aware = user_tz_obj.localize(meeting_end)
-    end_utc = end_aware.astimezone(pytz.UTC).replace(tzinfo=None)
+    end_aware = meeting_end.replace(tzinfo=user_tz_obj)
+    end_utc = end_aware.astimezone(timezone.utc).replace(tzinfo=None)
     
     print(f"\n📋 EXTRACTED MEETING TIMES:")
-    print(f"   Start (user TZ): {meeting_start.strftime('%H:%M:%S')} {user_tz}")
-    print(f"   Start (UTC):     {start_utc.strftime('%H:%M:%S')} UTC")
-    print(f"   End (user TZ):   {meeting_end.strftime('%H:%M:%S')} {user_tz}")
-    print(f"   End (UTC):       {end_utc.strftime('%H:%M:%S')} UTC")
+    print(f"   Start (user TZ): {_hms(meeting_start)} {user_tz}")
+    print(f"   Start (UTC):     {_hms(start_utc)} UTC")
+    print(f"   End (user TZ):   {_hms(meeting_end)} {user_tz}")
+    print(f"   End (UTC):       {_hms(end_utc)} UTC")
     
     print(f"\n⚙️  SYSTEM PARAMETERS:")
     print(f"   PROACTIVE_CHECK_INTERVAL_MINUTES: 1 (checks every 1 minute)")
@@ -53,19 +65,19 @@ def test_corrected_meeting_timeline():
     print(f"\n📅 EXPECTED TIMELINE:")
     
     events = [
-        ("T+0:00", f"{utc_now.strftime('%H:%M:%S')} UTC", "User sends message, meeting extracted"),
-        ("T+1:00", f"{(utc_now + timedelta(minutes=1)).strftime('%H:%M:%S')} UTC", 
+        ("T+0:00", f"{_hms(utc_now)} UTC", "User sends message, meeting extracted"),
+        ("T+1:00", f"{_hms(utc_now + timedelta(minutes=1))} UTC", 
          "✅ Proactive checker runs\n        - Check: Is meeting in next 30 min?\n        - YES (meeting at T+2)\n        - 🔔 SENDS PREPARATION REMINDER"),
-        ("T+2:00", f"{(utc_now + timedelta(minutes=2)).strftime('%H:%M:%S')} UTC", "⏰ Meeting STARTS"),
-        ("T+4:00", f"{(utc_now + timedelta(minutes=4)).strftime('%H:%M:%S')} UTC", 
+        ("T+2:00", f"{_hms(utc_now + timedelta(minutes=2))} UTC", "⏰ Meeting STARTS"),
+        ("T+4:00", f"{_hms(utc_now + timedelta(minutes=4))} UTC", 
          "✅ Meeting ENDS\n        - Next check at T+4 or T+5\n        - Check: Has 5 min passed since end?\n        - NO (just ended)\n        - ⏳ Skip for now"),
-        ("T+5:00", f"{(utc_now + timedelta(minutes=5)).strftime('%H:%M:%S')} UTC",
+        ("T+5:00", f"{_hms(utc_now + timedelta(minutes=5))} UTC",
          "✅ Proactive checker runs\n        - Check: Has 5 min passed since meeting end?\n        - NO (exactly 1 min passed, need 5 min)\n        - ⏳ Skip"),
-        ("T+6:00", f"{(utc_now + timedelta(minutes=6)).strftime('%H:%M:%S')} UTC",
+        ("T+6:00", f"{_hms(utc_now + timedelta(minutes=6))} UTC",
          "✅ Proactive checker runs\n        - Check: Has 5 min passed since meeting end?\n        - NO (exactly 2 min passed, need 5 min)\n        - ⏳ Skip"),
-        ("T+7:00", f"{(utc_now + timedelta(minutes=7)).strftime('%H:%M:%S')} UTC",
+        ("T+7:00", f"{_hms(utc_now + timedelta(minutes=7))} UTC",
          "✅ Proactive checker runs\n        - Check: Has 5 min passed since meeting end (T+4)?\n        - YES (3 min passed, close enough)\n        - 🔔 SENDS COMPLETION MESSAGE: 'How was your meeting?'"),
-        ("T+9:00", f"{(utc_now + timedelta(minutes=9)).strftime('%H:%M:%S')} UTC",
+        ("T+9:00", f"{_hms(utc_now + timedelta(minutes=9))} UTC",
          "✅ Full 5 minute delay has passed since meeting end"),
     ]
     
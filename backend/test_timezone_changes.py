@@ -10,7 +10,6 @@ from utils.timezone import (
     format_for_user,
     get_user_current_time
 )
-import pytz
 
 def test_timezone_conversions():
     """Test all timezone conversion functions."""
@@ -73,5 +72,23 @@ def test_timezone_conversions():
     print("All timezone conversion tests completed!")
     print("=" * 60)
 
+def test_dst_transitions():
+    """Local times around DST changes convert to the right UTC instant."""
+    tz = 'America/New_York'
+    
+    # Either side of the spring-forward gap (2024-03-10 02:00 EST -> 03:00 EDT)
+    assert to_utc(datetime(2024, 3, 10, 1, 30), tz) == datetime(2024, 3, 10, 6, 30)
+    assert to_utc(datetime(2024, 3, 10, 3, 30), tz) == datetime(2024, 3, 10, 7, 30)
+    
+    # The repeated fall-back hour resolves to its first (EDT) occurrence
+    assert to_utc(datetime(2024, 11, 3, 1, 30), tz) == datetime(2024, 11, 3, 5, 30)
+    assert to_utc(datetime(2024, 11, 3, 2, 30), tz) == datetime(2024, 11, 3, 7, 30)
+    
+    # And back again, with the offset in effect at each instant
+    assert to_user_timezone(datetime(2024, 11, 3, 5, 30), tz).utcoffset().total_seconds() == -4 * 3600
+    assert to_user_timezone(datetime(2024, 11, 3, 6, 30), tz).utcoffset().total_seconds() == -5 * 3600
+    assert format_for_user(datetime(2024, 7, 1, 16, 0), tz, "%H:%M %Z") == "12:00 EDT"
+
 if __name__ == "__main__":
     test_timezone_conversions()
+    test_dst_transitions()
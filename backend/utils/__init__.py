@@ -1,50 +1,51 @@
 # backend/utils/__init__.py
 """
 Export all utility modules
+
+Submodules are imported on first attribute access, so touching one
+utility (e.g. utils.timezone) doesn't pull in auth/jwt, the tone
+generator and the rest.
 """
-from .rate_limiter import RateLimiter
-from .tone_generator import generate_tone_summary
-from .auth import (
-    create_access_token, 
-    decode_access_token, 
-    get_current_user, 
-    get_current_user_optional,
-    security
-)
-from .helpers import (
-    generate_token,
-    truncate_text,
-    is_valid_timezone,
-    sanitize_message
-)
-from .validation import (
-    validate_email,
-    validate_password,
-    validate_timezone
-)
-
-__all__ = [
+import importlib
+
+# Exported name -> submodule that defines it
+_LAZY = {
     # Rate limiting
-    "RateLimiter",
-    
+    "RateLimiter": "rate_limiter",
+
     # Tone generation
-    "generate_tone_summary",
-    
+    "generate_tone_summary": "tone_generator",
+
     # Authentication
-    "create_access_token",
-    "decode_access_token", 
-    "get_current_user",
-    "get_current_user_optional",
-    "security",
-    
+    "create_access_token": "auth",
+    "decode_access_token": "auth",
+    "get_current_user": "auth",
+    "get_current_user_optional": "auth",
+    "security": "auth",
+
     # Helpers
-    "generate_token",
-    "truncate_text",
-    "is_valid_timezone",
-    "sanitize_message",
-    
+    "generate_token": "helpers",
+    "truncate_text": "helpers",
+    "is_valid_timezone": "helpers",
+    "sanitize_message": "helpers",
+
     # Validation
-    "validate_email",
-    "validate_password",
-    "validate_timezone",
-]
\ No newline at end of file
+    "validate_email": "validation",
+    "validate_password": "validation",
+    "validate_timezone": "validation",
+}
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(f".{_LAZY[name]}", __name__)
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -1,118 +1,29 @@
-# # backend/utils/auth.py
-# """
-# Authentication utilities
-# """
-# import jwt
-# from datetime import datetime, timedelta
-# from typing import Optional
-# from fastapi import HTTPException, Security
-# from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-# from sqlalchemy.ext.asyncio import AsyncSession
-# from sqlalchemy import select
-# import os
-# import uuid
-# from fastapi import Depends
-# from database import get_db
-# from models.sql_models import User
-# from passlib.context import CryptContext
-
-# security = HTTPBearer()
-# SECRET_KEY = os.getenv("SECRET_KEY", "c2fb03d064ff4ed71c8e85905addd4e0")
-# ALGORITHM = "HS256"
-# ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 days
-# pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-# def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
-#     """Create JWT access token."""
-#     to_encode = data.copy()
-    
-#     if expires_delta:
-#         expire = datetime.utcnow() + expires_delta
-#     else:
-#         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    
-#     to_encode.update({"exp": expire})
-#     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-#     return encoded_jwt
-
-# def decode_access_token(token: str):
-#     """Decode JWT access token."""
-#     try:
-#         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-#         return payload
-#     except jwt.ExpiredSignatureError:
-#         raise HTTPException(status_code=401, detail="Token expired")
-#     except jwt.InvalidTokenError:
-#         raise HTTPException(status_code=401, detail="Invalid token")
-
-# async def get_current_user(
-#     credentials: HTTPAuthorizationCredentials = Security(security),
-#     db: AsyncSession = Depends(get_db)
-# ) -> User:
-#     """Get current user from JWT token."""
-    
-#     token = credentials.credentials
-#     payload = decode_access_token(token)
-    
-#     user_id = payload.get("user_id")
-#     if not user_id:
-#         raise HTTPException(status_code=401, detail="Invalid token")
-    
-#     result = await db.execute(
-#         select(User).where(User.id == uuid.UUID(user_id))
-#     )
-#     user = result.scalar_one_or_none()
-    
-#     if not user:
-#         raise HTTPException(status_code=401, detail="User not found")
-    
-#     if not user.is_active:
-#         raise HTTPException(status_code=401, detail="User inactive")
-    
-#     return user
-
-# async def get_current_user_optional(
-#     credentials: Optional[HTTPAuthorizationCredentials] = Security(security),
-#     db: AsyncSession = Depends(get_db)
-# ) -> Optional[User]:
-#     """Get current user from JWT token (optional)."""
-    
-#     if not credentials:
-#         return None
-    
-#     try:
-#         return await get_current_user(credentials, db)
-#     except HTTPException:
-#         return None
-# def verify_password(plain_password, hashed_password):
-#     return pwd_context.verify(plain_password, hashed_password)
-
-# def get_password_hash(password):
-#     return pwd_context.hash(password)
-
-# def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
-#     to_encode = data.copy()
-#     if expires_delta:
-#         expire = datetime.utcnow() + expires_delta
-#     else:
-#         expire = datetime.utcnow() + timedelta(minutes=15)
-#     to_encode.update({"exp": expire})
 # backend/utils/auth.py
 """
 Authentication and Authorization utilities
 """
+import asyncio
 import os
+import hashlib
+import json
+import threading
+import time
 import jwt
 import bcrypt
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from dataclasses import dataclass
+from datetime import timedelta
+from types import MappingProxyType
+from jwt.algorithms import HMACAlgorithm
+from typing import Optional, Dict, Any, Mapping
 from fastapi import HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, event
+from sqlalchemy.orm import make_transient_to_detached
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi import HTTPException, Security
 
+from constants import BCRYPT_ROUNDS
 from database import get_db
 from models.sql_models import User
 
@@ -124,9 +35,133 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/token")
 
+
+class _PreparedHMAC(HMACAlgorithm):
+    """HMAC whose key checks/encoding run once per key, not once per token."""
+    
+    def __init__(self, hash_alg):
+        super().__init__(hash_alg)
+        self._prepared: Dict[Any, bytes] = {}
+    
+    def prepare_key(self, key):
+        prepared = self._prepared.get(key)
+        if prepared is None:
+            prepared = self._prepared[key] = super().prepare_key(key)
+        return prepared
+
+
+# Signer reused by create_access_token; output is identical to jwt.encode
+_jws = jwt.PyJWS(algorithms=[])
+_jws.register_algorithm(ALGORITHM, _PreparedHMAC(HMACAlgorithm.SHA256))
+
+# Validated JWT payloads, keyed by a token digest -> (payload, cached_until).
+# Entries never outlive the token's own exp, so expiry is still enforced.
+JWT_CACHE_TTL_SECONDS = 30
+JWT_CACHE_MAX_SIZE = 10000
+_jwt_cache: Dict[bytes, tuple] = {}
+_jwt_cache_lock = threading.Lock()
+
+def _decode_cached(token: str) -> Dict[str, Any]:
+    """jwt.decode with a short in-process cache of already-validated tokens."""
+    key = hashlib.sha256(token.encode('utf-8')).digest()[:16]
+    now = time.time()
+    
+    with _jwt_cache_lock:
+        entry = _jwt_cache.get(key)
+        if entry is not None:
+            if entry[1] > now:
+                return entry[0]
+            del _jwt_cache[key]
+    
+    # Raises ExpiredSignatureError / InvalidTokenError like a plain decode
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    
+    cached_until = now + JWT_CACHE_TTL_SECONDS
+    exp = payload.get("exp")
+    if exp is not None:
+        cached_until = min(cached_until, float(exp))
+    
+    with _jwt_cache_lock:
+        if len(_jwt_cache) >= JWT_CACHE_MAX_SIZE:
+            for stale_key in [k for k, (_, until) in _jwt_cache.items() if until <= now]:
+                del _jwt_cache[stale_key]
+            if len(_jwt_cache) >= JWT_CACHE_MAX_SIZE:
+                # Still full: drop the oldest insertion
+                del _jwt_cache[next(iter(_jwt_cache))]
+        _jwt_cache[key] = (payload, cached_until)
+    
+    return payload
+
+@dataclass(frozen=True)
+class _UserSnapshot:
+    """Column values of a User as they were when it was cached."""
+    columns: Mapping[str, Any]
+    cached_until: float
+
+# Snapshots of recently authenticated users: str(user_id) -> _UserSnapshot.
+# ORM updates/deletes of a User evict its entry (see listeners below), and code
+# that changes users with Core UPDATEs calls invalidate_user(). Changes made by
+# other processes (e.g. Celery proactive sends) may be seen up to
+# USER_CACHE_TTL_SECONDS late; code that decides on counters reads them fresh.
+USER_CACHE_TTL_SECONDS = 60
+USER_CACHE_MAX_SIZE = 5000
+_user_cache: Dict[str, _UserSnapshot] = {}
+_user_cache_lock = threading.Lock()
+
+def invalidate_user(user_id) -> None:
+    """Drop a user from the auth cache (call after changing the user outside the ORM)."""
+    with _user_cache_lock:
+        _user_cache.pop(str(user_id), None)
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _evict_user_on_write(mapper, connection, target):
+    invalidate_user(target.id)
+
+async def _load_user(db: AsyncSession, user_id: str) -> Optional[User]:
+    """Load the user for a token, serving repeat requests from the snapshot cache.
+    
+    The cache holds frozen snapshots only. Hits are rebuilt as a persistent
+    instance and merged into the request's session without a SELECT, so
+    endpoints can still modify and commit current_user as usual.
+    """
+    now = time.time()
+    key = str(user_id)
+    
+    with _user_cache_lock:
+        entry = _user_cache.get(key)
+        if entry is not None and entry.cached_until <= now:
+            del _user_cache[key]
+            entry = None
+    
+    if entry is not None:
+        user = User(**entry.columns)
+        make_transient_to_detached(user)
+        return await db.merge(user, load=False)
+    
+    result = await db.execute(
+        select(User).where(User.id == user_id)
+    )
+    user = result.scalar_one_or_none()
+    
+    if user is not None:
+        snapshot = _UserSnapshot(
+            columns=MappingProxyType({attr.key: getattr(user, attr.key) for attr in User.__mapper__.column_attrs}),
+            cached_until=now + USER_CACHE_TTL_SECONDS
+        )
+        with _user_cache_lock:
+            if len(_user_cache) >= USER_CACHE_MAX_SIZE:
+                for stale_key in [k for k, cached in _user_cache.items() if cached.cached_until <= now]:
+                    del _user_cache[stale_key]
+                if len(_user_cache) >= USER_CACHE_MAX_SIZE:
+                    del _user_cache[next(iter(_user_cache))]
+            _user_cache[key] = snapshot
+    
+    return user
+
 def hash_password(password: str) -> str:
     """Hash a password for storing."""
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
     return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -139,18 +174,27 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     except Exception:
         return False
 
+async def hash_password_async(password: str) -> str:
+    """hash_password in a worker thread so bcrypt doesn't block the event loop."""
+    return await asyncio.to_thread(hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password in a worker thread so bcrypt doesn't block the event loop."""
+    return await asyncio.to_thread(verify_password, plain_password, hashed_password)
+
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     """Create a new JWT access token."""
     to_encode = data.copy()
     
+    # exp as an int epoch; PyJWT would convert a datetime to this anyway
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        lifetime = int(expires_delta.total_seconds())
     else:
-        expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        lifetime = ACCESS_TOKEN_EXPIRE_MINUTES * 60
     
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
+    to_encode.update({"exp": int(time.time()) + lifetime})
+    payload = json.dumps(to_encode, separators=(",", ":")).encode("utf-8")
+    return _jws.encode(payload, SECRET_KEY, algorithm=ALGORITHM, headers={"typ": "JWT"})
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
@@ -164,18 +208,15 @@ async def get_current_user(
     )
     
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = _decode_cached(token)
         user_id: str = payload.get("sub")
         if user_id is None:
             raise credentials_exception
     except jwt.PyJWTError:
         raise credentials_exception
     
-    # Get user from database
-    result = await db.execute(
-        select(User).where(User.id == user_id)
-    )
-    user = result.scalar_one_or_none()
+    # Get user from cache or database
+    user = await _load_user(db, user_id)
     
     if user is None:
         raise credentials_exception
@@ -187,6 +228,7 @@ async def get_current_active_user(
 ) -> User:
     """Get current active user."""
     if not current_user.is_active:
+        invalidate_user(current_user.id)
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Inactive user"
@@ -207,7 +249,7 @@ async def get_current_admin_user(
 def decode_access_token(token: str):
     """Decode JWT access token."""
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = _decode_cached(token)
         return payload
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
@@ -231,9 +273,6 @@ async def get_current_user_optional(
         if not user_id:
             return None
         
-        result = await db.execute(
-            select(User).where(User.id == user_id)
-        )
-        return result.scalar_one_or_none()
+        return await _load_user(db, user_id)
     except HTTPException:
         return None
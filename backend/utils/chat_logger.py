@@ -1,18 +1,53 @@
 # backend/utils/chat_logger.py - Chat Logging Utility
 """
 Chat logging utility for storing user conversations
-Logs are organized by user_id/bot_id/YYYY-MM-DD.log
+Logs are organized by user_id/bot_id/YYYY-MM-DD.jsonl, one JSON entry per
+line so logging a message is a plain append. Older YYYY-MM-DD.log files
+(a single JSON array) are converted on first access.
+
+Once start() has been awaited, entries are queued and appended by a
+background writer task instead of blocking the caller on disk I/O.
 """
 import os
+import asyncio
 import logging
+from collections import OrderedDict, deque
 from datetime import datetime
 from typing import Optional
 from pathlib import Path
 import json
+import aiofiles
 from config.settings import settings
+from .helpers import log_sampled_error
+
+# orjson serializes log entries several times faster than the stdlib
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+# Writer batching: flush after this many entries or this many seconds
+WRITER_BATCH_SIZE = 64
+WRITER_BATCH_SECONDS = 0.05
+
+# Parsed history tails kept for repeat dashboard reads
+HISTORY_CACHE_SIZE = 256
+
+
+def _dumps_line(entry: dict) -> str:
+    """Serialize one log entry as a JSONL line."""
+    if orjson is not None:
+        return orjson.dumps(entry).decode("utf-8") + "\n"
+    return json.dumps(entry, ensure_ascii=False) + "\n"
+
+
+def _loads(data):
+    """Parse JSON text (orjson.JSONDecodeError subclasses json's)."""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
 class ChatLogger:
     """Utility class for logging user-bot conversations."""
     
@@ -20,14 +55,37 @@ class ChatLogger:
         """Initialize chat logger."""
         self.enabled = settings.enable_chat_logging
         self.logs_dir = settings.chat_logs_dir
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        # (user_folder, bot_id, date) -> (mtime_ns, size, lines_read, entries)
+        self._history_cache: OrderedDict = OrderedDict()
         
         if self.enabled:
             # Create logs directory if it doesn't exist
             Path(self.logs_dir).mkdir(parents=True, exist_ok=True)
-            logger.info(f"Chat logging enabled. Logs directory: {self.logs_dir}")
+            logger.info("Chat logging enabled. Logs directory: %s", self.logs_dir)
         else:
             logger.info("Chat logging is disabled")
     
+    async def start(self):
+        """Start the background writer on the running event loop."""
+        if not self.enabled or self._writer_task is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=10000)
+        self._writer_task = asyncio.create_task(self._writer())
+        logger.info("Chat log writer started")
+    
+    async def stop(self):
+        """Flush queued entries and stop the background writer."""
+        if self._writer_task is None:
+            return
+        await self._queue.join()
+        self._writer_task.cancel()
+        await asyncio.gather(self._writer_task, return_exceptions=True)
+        self._writer_task = None
+        self._queue = None
+        logger.info("Chat log writer stopped")
+    
     def log_conversation(
         self,
         user_id: str,
@@ -60,11 +118,6 @@ class ChatLogger:
             # Create user/bot directory structure with username_userid format
             user_folder = f"{username}_{user_id}"
             user_bot_dir = Path(self.logs_dir) / user_folder / str(bot_id)
-            user_bot_dir.mkdir(parents=True, exist_ok=True)
-            
-            # Create log file with current date
-            date_str = datetime.utcnow().strftime("%Y-%m-%d")
-            log_file = user_bot_dir / f"{date_str}.log"
             
             # Prepare log entry (simplified structure)
             timestamp = datetime.utcnow().isoformat()
@@ -76,43 +129,12 @@ class ChatLogger:
                 "source": source
             }
             
-            # Read existing logs or create new array
-            if log_file.exists():
-                with open(log_file, 'r', encoding='utf-8') as f:
-                    try:
-                        logs = json.load(f)
-                    except json.JSONDecodeError:
-                        logs = []
-            else:
-                logs = []
-            
-            # Append new entry
-            logs.append(log_entry)
-            
-            # Write back to daily file
-            with open(log_file, 'w', encoding='utf-8') as f:
-                json.dump(logs, f, ensure_ascii=False, indent=2)
-            
-            # Also append to combined log file
-            combined_file = user_bot_dir / "combined.log"
-            if combined_file.exists():
-                with open(combined_file, 'r', encoding='utf-8') as f:
-                    try:
-                        combined_logs = json.load(f)
-                    except json.JSONDecodeError:
-                        combined_logs = []
-            else:
-                combined_logs = []
-            
-            combined_logs.append(log_entry)
-            
-            with open(combined_file, 'w', encoding='utf-8') as f:
-                json.dump(combined_logs, f, ensure_ascii=False, indent=2)
+            self._append_entry(user_bot_dir, log_entry)
             
             return True
             
         except Exception as e:
-            logger.error(f"Error logging conversation: {e}", exc_info=True)
+            log_sampled_error(logger, "Error logging conversation: %s", e)
             return False
     
     def log_proactive_message(
@@ -143,10 +165,6 @@ class ChatLogger:
             # Create user/bot directory structure with username_userid format
             user_folder = f"{username}_{user_id}"
             user_bot_dir = Path(self.logs_dir) / user_folder / str(bot_id)
-            user_bot_dir.mkdir(parents=True, exist_ok=True)
-            
-            date_str = datetime.utcnow().strftime("%Y-%m-%d")
-            log_file = user_bot_dir / f"{date_str}.log"
             
             timestamp = datetime.utcnow().isoformat()
             log_entry = {
@@ -156,43 +174,12 @@ class ChatLogger:
                 "source": source
             }
             
-            # Read existing logs or create new array
-            if log_file.exists():
-                with open(log_file, 'r', encoding='utf-8') as f:
-                    try:
-                        logs = json.load(f)
-                    except json.JSONDecodeError:
-                        logs = []
-            else:
-                logs = []
-            
-            # Append new entry
-            logs.append(log_entry)
-            
-            # Write back to daily file
-            with open(log_file, 'w', encoding='utf-8') as f:
-                json.dump(logs, f, ensure_ascii=False, indent=2)
-            
-            # Also append to combined log file
-            combined_file = user_bot_dir / "combined.log"
-            if combined_file.exists():
-                with open(combined_file, 'r', encoding='utf-8') as f:
-                    try:
-                        combined_logs = json.load(f)
-                    except json.JSONDecodeError:
-                        combined_logs = []
-            else:
-                combined_logs = []
-            
-            combined_logs.append(log_entry)
-            
-            with open(combined_file, 'w', encoding='utf-8') as f:
-                json.dump(combined_logs, f, ensure_ascii=False, indent=2)
+            self._append_entry(user_bot_dir, log_entry)
             
             return True
             
         except Exception as e:
-            logger.error(f"Error logging proactive message: {e}", exc_info=True)
+            log_sampled_error(logger, "Error logging proactive message: %s", e)
             return False
     
     def get_conversation_history(
@@ -221,25 +208,43 @@ class ChatLogger:
         
         try:
             if not date:
-                date = datetime.utcnow().strftime("%Y-%m-%d")
+                date = datetime.utcnow().date().isoformat()
             
             user_folder = f"{username}_{user_id}"
-            log_file = Path(self.logs_dir) / user_folder / str(bot_id) / f"{date}.log"
+            log_file = Path(self.logs_dir) / user_folder / str(bot_id) / f"{date}.jsonl"
+            self._migrate_legacy(log_file)
             
-            if not log_file.exists():
+            if not log_file.exists() or limit <= 0:
                 return []
             
+            # Reuse the parsed tail while the file is unchanged
+            stat = log_file.stat()
+            cache_key = (user_folder, str(bot_id), date)
+            cached = self._history_cache.get(cache_key)
+            if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size) and cached[2] >= limit:
+                self._history_cache.move_to_end(cache_key)
+                return cached[3][-limit:]
+            
+            # Only the last `limit` lines are kept in memory
             with open(log_file, 'r', encoding='utf-8') as f:
+                lines = deque(f, maxlen=limit)
+            
+            conversations = []
+            for line in lines:
                 try:
-                    conversations = json.load(f)
+                    conversations.append(_loads(line))
                 except json.JSONDecodeError:
-                    conversations = []
+                    continue
+            
+            self._history_cache[cache_key] = (stat.st_mtime_ns, stat.st_size, limit, conversations)
+            self._history_cache.move_to_end(cache_key)
+            if len(self._history_cache) > HISTORY_CACHE_SIZE:
+                self._history_cache.popitem(last=False)
             
-            # Return most recent entries up to limit
-            return conversations[-limit:] if conversations else []
+            return conversations
             
         except Exception as e:
-            logger.error(f"Error retrieving conversation history: {e}", exc_info=True)
+            log_sampled_error(logger, "Error retrieving conversation history: %s", e)
             return []
     
     def get_user_stats(self, user_id: str, bot_id: Optional[str] = None) -> dict:
@@ -296,20 +301,109 @@ class ChatLogger:
             return stats
             
         except Exception as e:
-            logger.error(f"Error getting user stats: {e}", exc_info=True)
+            log_sampled_error(logger, "Error getting user stats: %s", e)
             return {"enabled": True, "error": str(e)}
     
     def _count_conversations_in_dir(self, directory: Path) -> int:
         """Count total conversation entries in a directory."""
+        for legacy_file in directory.glob("*.log"):
+            self._migrate_legacy(legacy_file.with_suffix(".jsonl"))
+        
         count = 0
-        for log_file in directory.glob("*.log"):
+        for log_file in directory.glob("*.jsonl"):
             try:
                 with open(log_file, 'r', encoding='utf-8') as f:
-                    logs = json.load(f)
-                    count += len(logs) if isinstance(logs, list) else 0
+                    count += sum(1 for line in f if line.strip())
             except Exception:
                 continue
         return count
+    
+    def _append_entry(self, user_bot_dir: Path, log_entry: dict):
+        """Append an entry to today's log and the combined log."""
+        line = _dumps_line(log_entry)
+        date_str = datetime.utcnow().date().isoformat()
+        log_files = (user_bot_dir / f"{date_str}.jsonl", user_bot_dir / "combined.jsonl")
+        
+        if self._queue is not None and self._on_writer_loop():
+            try:
+                for log_file in log_files:
+                    self._queue.put_nowait((log_file, line))
+                return
+            except asyncio.QueueFull:
+                logger.warning("Chat log queue full, writing synchronously")
+        
+        # No writer running here (scripts, Celery tasks, a full queue)
+        user_bot_dir.mkdir(parents=True, exist_ok=True)
+        for log_file in log_files:
+            self._migrate_legacy(log_file)
+            with open(log_file, 'a', encoding='utf-8') as f:
+                f.write(line)
+    
+    def _on_writer_loop(self) -> bool:
+        """Whether we are on the event loop that owns the writer task."""
+        try:
+            return asyncio.get_running_loop() is self._writer_task.get_loop()
+        except RuntimeError:
+            return False
+    
+    async def _writer(self):
+        """Drain the queue, appending lines to their files in small batches."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + WRITER_BATCH_SECONDS
+            while len(batch) < WRITER_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            # Group by file so each file is opened once per batch
+            by_file = {}
+            for log_file, line in batch:
+                by_file.setdefault(log_file, []).append(line)
+            
+            try:
+                for log_file, lines in by_file.items():
+                    await asyncio.to_thread(self._prepare_file, log_file)
+                    async with aiofiles.open(log_file, 'a', encoding='utf-8') as f:
+                        await f.write("".join(lines))
+            except Exception as e:
+                log_sampled_error(logger, "Error writing chat logs: %s", e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+    
+    def _prepare_file(self, log_file: Path):
+        """Create the directory and convert any legacy log before appending."""
+        log_file.parent.mkdir(parents=True, exist_ok=True)
+        self._migrate_legacy(log_file)
+    
+    def _migrate_legacy(self, log_file: Path):
+        """Convert the JSON-array .log next to log_file into JSONL, once."""
+        legacy_file = log_file.with_suffix(".log")
+        if not legacy_file.exists():
+            return
+        
+        try:
+            with open(legacy_file, 'r', encoding='utf-8') as f:
+                entries = _loads(f.read())
+        except json.JSONDecodeError:
+            entries = []
+        if not isinstance(entries, list):
+            entries = []
+        
+        # Legacy entries are older, so they go before anything already in the JSONL
+        existing = log_file.read_text(encoding='utf-8') if log_file.exists() else ""
+        with open(log_file, 'w', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(_dumps_line(entry))
+            f.write(existing)
+        legacy_file.unlink()
+        logger.info("Converted legacy chat log %s to JSONL", legacy_file)
 
 
 # Global chat logger instance
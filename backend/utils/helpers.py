@@ -1,26 +1,30 @@
 # backend/utils/helpers.py
 """Simple helper functions"""
-import random
-import string
+import secrets
+import logging
+from collections import Counter
 from datetime import datetime, timedelta
-import pytz
+from .timezone import is_valid_timezone  # re-exported
 
 def generate_token(length: int = 32) -> str:
-    """Generate a random token."""
-    return ''.join(random.choices(string.ascii_letters + string.digits, k=length))
+    """Generate a cryptographically strong, URL-safe random token."""
+    return secrets.token_urlsafe(length)[:length]
 
 def truncate_text(text: str, max_length: int = 100) -> str:
     """Truncate text to specified length."""
     return text if len(text) <= max_length else text[:max_length-3] + "..."
 
-def is_valid_timezone(timezone: str) -> bool:
-    """Check if timezone is valid."""
-    try:
-        pytz.timezone(timezone)
-        return True
-    except:
-        return False
-
 def sanitize_message(content: str) -> str:
     """Sanitize message content."""
-    return content.replace('\x00', '').strip()[:4000]
+    # Messages almost never carry NULs; the membership test skips the copy
+    if '\x00' in content:
+        content = content.replace('\x00', '')
+    return content.strip()[:4000]
+
+_error_counts = Counter()
+
+def log_sampled_error(log: logging.Logger, message: str, error: BaseException, every: int = 100) -> None:
+    """Log a recurring error as a one-line warning; 1 in `every` (and the first) carries the traceback."""
+    seen = _error_counts[message]
+    _error_counts[message] = seen + 1
+    log.warning(message, error, exc_info=error if seen % every == 0 else None)
@@ -1,12 +1,22 @@
 """
 Rate limiting utilities - FIXED for SQLAlchemy
 """
+import asyncio
 import logging
 import time
+from collections import Counter, deque
+from functools import lru_cache
 from datetime import datetime, timedelta
-from typing import Optional, Tuple, List
+from typing import Deque, Dict, Optional, Tuple, List, Union
+from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, text
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import bindparam, case, select, func, text, update
+
+from database import AsyncSessionLocal
+from models.sql_models import Message, User
+from .auth import invalidate_user
+from .helpers import log_sampled_error
 
 from constants import (
     RATE_LIMIT_MESSAGES_PER_MINUTE,
@@ -19,6 +29,95 @@ from constants import (
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=4096)
+def _parse_uuid(user_id: str) -> UUID:
+    return UUID(user_id)
+
+
+def _to_uuid(user_id: Union[str, UUID]) -> UUID:
+    """UUID() parsing is slow and runs on every message; cache it per id string."""
+    return _parse_uuid(user_id) if isinstance(user_id, str) else user_id
+
+
+# Per-user sliding window of recent message times (time.monotonic()).
+# A user's window is seeded from the messages table the first time they
+# are seen by this worker; after that the check never touches the DB.
+# Entries are kept in order of last use, so windows that went idle sit at
+# the front and are dropped from there (and re-seeded if the user returns).
+_rl_windows: Dict[UUID, Deque[float]] = {}
+
+# Recently seen (user, content hash) -> monotonic expiry. Entries share one
+# TTL, so insertion order is expiry order and purging pops from the front.
+_dedup: Dict[Tuple[UUID, int], float] = {}
+
+# messages_today increments not yet written; flushed in one transaction
+# every DAILY_COUNT_FLUSH_SECONDS (a crash loses at most that much)
+DAILY_COUNT_FLUSH_SECONDS = 0.5
+_pending_daily: Counter = Counter()
+_flush_task: Optional[asyncio.Task] = None
+_flush_lock = asyncio.Lock()
+
+
+async def flush_daily_counts():
+    """
+    Write all pending messages_today increments with a single commit.
+    
+    The counts stay in _pending_daily until the commit succeeds, so
+    check_daily_limit still sees them while the write is in flight.
+    """
+    async with _flush_lock:
+        if not _pending_daily:
+            return
+        
+        pending = dict(_pending_daily)
+        
+        users = User.__table__
+        stmt = users.update().where(users.c.id == bindparam('uid')).values(
+            messages_today=func.coalesce(users.c.messages_today, 0) + bindparam('n')
+        )
+        try:
+            async with AsyncSessionLocal() as session:
+                await session.execute(stmt, [{'uid': uid, 'n': n} for uid, n in pending.items()])
+                await session.commit()
+                # Keep only the increments that arrived during the write
+                for uid, n in pending.items():
+                    left = _pending_daily[uid] - n
+                    if left > 0:
+                        _pending_daily[uid] = left
+                    else:
+                        del _pending_daily[uid]
+                    invalidate_user(uid)
+            logger.debug("Flushed daily counts for %s user(s)", len(pending))
+        except Exception as e:
+            log_sampled_error(logger, "Error flushing daily counts: %s", e)
+
+
+async def _flush_daily_counts_loop():
+    while True:
+        await asyncio.sleep(DAILY_COUNT_FLUSH_SECONDS)
+        # A flush cancelled mid-commit couldn't tell whether its counts were
+        # written, so cancelling the loop lets a running flush finish
+        await asyncio.shield(flush_daily_counts())
+
+
+async def stop_daily_count_flusher():
+    """Stop the background flusher; follow with flush_daily_counts() to write the rest."""
+    global _flush_task
+    task, _flush_task = _flush_task, None
+    if task is not None and not task.done():
+        task.cancel()
+        if task.get_loop() is asyncio.get_running_loop():
+            await asyncio.gather(task, return_exceptions=True)
+
+
+def _ensure_flush_task():
+    """Start the flusher on the running loop if it isn't running there yet."""
+    global _flush_task
+    loop = asyncio.get_running_loop()
+    if _flush_task is None or _flush_task.done() or _flush_task.get_loop() is not loop:
+        _flush_task = loop.create_task(_flush_daily_counts_loop())
+
+
 class RateLimiter:
     """Rate limiter with SQLAlchemy syntax."""
     
@@ -26,45 +125,73 @@ class RateLimiter:
         self.db = db
     
     async def check_rate_limit(self, user_id: str) -> Tuple[bool, int]:
-        """Check rate limit for user - FIXED."""
-        from models.sql_models import Message
-        from uuid import UUID
-        
+        """Check rate limit for user against an in-process sliding window."""
         try:
-            user_uuid = UUID(user_id) if isinstance(user_id, str) else user_id
-            one_minute_ago = datetime.utcnow() - timedelta(seconds=RATE_LIMIT_WINDOW_SECONDS)
-            
-            # Count messages in last minute
-            stmt = select(func.count(Message.id)).where(
-                Message.user_id == user_uuid,
-                Message.created_at >= one_minute_ago,
-                Message.role == 'user'
-            )
+            user_uuid = _to_uuid(user_id)
+            window = _rl_windows.get(user_uuid)
+            if window is None:
+                window = await self._seed_window(user_uuid)
             
-            result = await self.db.execute(stmt)
-            count = result.scalar() or 0
+            # Drop timestamps that fell out of the window. No awaits from here
+            # on, so the check-and-append is atomic on the event loop.
+            cutoff = time.monotonic() - RATE_LIMIT_WINDOW_SECONDS
+            while window and window[0] < cutoff:
+                window.popleft()
+            
+            # Move this user to the back and drop idle windows from the front
+            _rl_windows[user_uuid] = _rl_windows.pop(user_uuid, window)
+            while _rl_windows:
+                oldest = next(iter(_rl_windows))
+                if oldest == user_uuid:
+                    break
+                oldest_window = _rl_windows[oldest]
+                if oldest_window and oldest_window[-1] >= cutoff:
+                    break
+                del _rl_windows[oldest]
             
+            count = len(window)
             is_limited = count >= RATE_LIMIT_MESSAGES_PER_MINUTE
             
             if is_limited:
-                logger.warning(f"Rate limit hit for user {user_id}: {count}/{RATE_LIMIT_MESSAGES_PER_MINUTE}")
+                logger.warning("Rate limit hit for user %s: %s/%s", user_id, count, RATE_LIMIT_MESSAGES_PER_MINUTE)
+            else:
+                window.append(time.monotonic())
             
             return (is_limited, count)
             
         except Exception as e:
-            logger.error(f"Error checking rate limit: {e}")
+            log_sampled_error(logger, "Error checking rate limit: %s", e)
             return (False, 0)
     
+    async def _seed_window(self, user_uuid: UUID) -> Deque[float]:
+        """Build a user's window from their messages in the last minute."""
+        now_utc = datetime.utcnow()
+        stmt = select(Message.created_at).where(
+            Message.user_id == user_uuid,
+            Message.created_at >= now_utc - timedelta(seconds=RATE_LIMIT_WINDOW_SECONDS),
+            Message.role == 'user'
+        ).order_by(Message.created_at)
+        
+        result = await self.db.execute(stmt)
+        now_mono = time.monotonic()
+        # Another check for this user may have seeded it while we awaited
+        window = _rl_windows.get(user_uuid)
+        if window is None:
+            window = deque(
+                now_mono - (now_utc - created_at).total_seconds()
+                for created_at in result.scalars()
+            )
+            _rl_windows[user_uuid] = window
+        return window
+    
     async def check_daily_limit(self, user_id: str) -> Tuple[bool, int, int]:
         """Check daily message limit - FIXED."""
-        from models.sql_models import User
-        from uuid import UUID
-        
         try:
-            user_uuid = UUID(user_id) if isinstance(user_id, str) else user_id
+            user_uuid = _to_uuid(user_id)
             
-            # Get user
-            stmt = select(User).where(User.id == user_uuid)
+            # Get user; populate_existing refreshes a current_user built from
+            # the auth cache, whose counters may be out of date
+            stmt = select(User).where(User.id == user_uuid).execution_options(populate_existing=True)
             result = await self.db.execute(stmt)
             user = result.scalar_one_or_none()
             
@@ -73,67 +200,100 @@ class RateLimiter:
             
             tier = user.tier or 'free'
             limit = MESSAGE_LIMITS.get(tier, 20)
-            remaining = max(0, limit - user.messages_today)
-            can_send = user.messages_today < limit
+            # Include increments that haven't been flushed yet
+            messages_today = (user.messages_today or 0) + _pending_daily[user_uuid]
+            remaining = max(0, limit - messages_today)
+            can_send = messages_today < limit
             
             if not can_send:
-                logger.warning(f"Daily limit hit for user {user_id}: {user.messages_today}/{limit}")
+                logger.warning("Daily limit hit for user %s: %s/%s", user_id, messages_today, limit)
             
             return (can_send, remaining, limit)
             
         except Exception as e:
-            logger.error(f"Error checking daily limit: {e}")
+            log_sampled_error(logger, "Error checking daily limit: %s", e)
             return (True, MESSAGE_LIMITS['free'], MESSAGE_LIMITS['free'])
     
-    async def check_duplicate(self, user_id: str, message: str) -> bool:
-        """Check for duplicate messages - FIXED."""
-        from models.sql_models import Message
-        from uuid import UUID
+    async def check_and_increment_daily(self, user_id: str) -> Tuple[bool, int, int]:
+        """
+        Atomically check the daily limit and count the message.
         
+        A single UPDATE ... WHERE messages_today < limit RETURNING both checks
+        and increments, so two concurrent messages can't both slip in at
+        limit - 1. The tier's limit is resolved in SQL with a CASE over
+        MESSAGE_LIMITS. The caller owns the transaction and commits it with
+        the message itself.
+        """
         try:
-            user_uuid = UUID(user_id) if isinstance(user_id, str) else user_id
-            five_seconds_ago = datetime.utcnow() - timedelta(seconds=DEDUP_WINDOW_SECONDS)
+            user_uuid = _to_uuid(user_id)
+            tier = func.coalesce(User.tier, 'free')
+            limit_expr = case(MESSAGE_LIMITS, value=tier, else_=20)
+            messages_today = func.coalesce(User.messages_today, 0)
             
-            # Check for recent duplicate messages
-            stmt = select(Message.id).where(
-                Message.user_id == user_uuid,
-                Message.content == message,
-                Message.created_at >= five_seconds_ago,
-                Message.role == 'user'
-            ).limit(1)
+            stmt = (
+                update(User)
+                .where(User.id == user_uuid, messages_today < limit_expr)
+                .values(messages_today=messages_today + 1)
+                .returning(User.messages_today, limit_expr)
+                .execution_options(synchronize_session=False)
+            )
+            row = (await self.db.execute(stmt)).first()
             
-            result = await self.db.execute(stmt)
-            duplicate = result.scalar_one_or_none() is not None
+            if row is None:
+                # Either at the limit or no such user; look up the tier for the reply
+                result = await self.db.execute(select(User.tier).where(User.id == user_uuid))
+                tier_value = result.scalar_one_or_none()
+                limit = MESSAGE_LIMITS.get(tier_value or 'free', 20)
+                logger.warning("Daily limit hit for user %s: %s/%s", user_id, limit, limit)
+                return (False, 0, limit)
+            
+            count, limit = row
+            invalidate_user(user_uuid)
+            # Keep an already-loaded User in step without expiring it (a lazy
+            # refresh would need another await) or marking it dirty
+            loaded = self.db.identity_map.get(self.db.identity_key(User, user_uuid))
+            if loaded is not None:
+                set_committed_value(loaded, 'messages_today', count)
+            return (True, max(0, limit - count), limit)
+            
+        except Exception as e:
+            log_sampled_error(logger, "Error checking daily limit: %s", e)
+            await self.db.rollback()
+            return (True, MESSAGE_LIMITS['free'], MESSAGE_LIMITS['free'])
+    
+    async def check_duplicate(self, user_id: str, message: str) -> bool:
+        """Check for a repeat of the same message within the dedup window."""
+        try:
+            user_uuid = _to_uuid(user_id)
+            now = time.monotonic()
             
-            if duplicate:
-                logger.debug(f"Duplicate message detected for user {user_id}")
+            # Drop expired entries from the front
+            while _dedup:
+                oldest = next(iter(_dedup))
+                if _dedup[oldest] > now:
+                    break
+                del _dedup[oldest]
             
-            return duplicate
+            key = (user_uuid, hash(message))
+            if key in _dedup:
+                logger.debug("Duplicate message detected for user %s", user_id)
+                return True
+            
+            _dedup[key] = now + DEDUP_WINDOW_SECONDS
+            return False
             
         except Exception as e:
-            logger.error(f"Error checking duplicate: {e}")
+            log_sampled_error(logger, "Error checking duplicate: %s", e)
             return False
     
     async def increment_daily_count(self, user_id: str):
-        """Increment daily message count - FIXED."""
-        from models.sql_models import User
-        from sqlalchemy import update
-        from uuid import UUID
-        
+        """Count a message; the DB write is batched by flush_daily_counts."""
         try:
-            user_uuid = UUID(user_id) if isinstance(user_id, str) else user_id
-            
-            stmt = update(User).where(User.id == user_uuid).values(
-                messages_today=User.messages_today + 1
-            )
-            await self.db.execute(stmt)
-            await self.db.commit()
-            
-            logger.debug(f"Incremented daily count for user {user_id}")
+            _pending_daily[_to_uuid(user_id)] += 1
+            _ensure_flush_task()
             
         except Exception as e:
-            logger.error(f"Error incrementing daily count: {e}")
-            await self.db.rollback()
+            log_sampled_error(logger, "Error incrementing daily count: %s", e)
     
     def get_limit_warning(self, remaining: int, limit: int) -> str:
         """Get warning message if approaching limit."""
@@ -145,14 +305,12 @@ class RateLimiter:
     
     async def check_proactive_limit(self, user_id: str) -> Tuple[bool, int, int]:
         """Check proactive message limit - FIXED."""
-        from models.sql_models import User
-        from uuid import UUID
-        
         try:
-            user_uuid = UUID(user_id) if isinstance(user_id, str) else user_id
+            user_uuid = _to_uuid(user_id)
             
-            # Get user
-            stmt = select(User).where(User.id == user_uuid)
+            # Get user; populate_existing refreshes a current_user built from
+            # the auth cache, whose counters may be out of date
+            stmt = select(User).where(User.id == user_uuid).execution_options(populate_existing=True)
             result = await self.db.execute(stmt)
             user = result.scalar_one_or_none()
             
@@ -167,26 +325,24 @@ class RateLimiter:
             return (can_send, remaining, limit)
             
         except Exception as e:
-            logger.error(f"Error checking proactive limit: {e}")
+            log_sampled_error(logger, "Error checking proactive limit: %s", e)
             return (False, 0, PROACTIVE_LIMITS['free'])
     
     async def increment_proactive_count(self, user_id: str):
         """Increment proactive message count - FIXED."""
-        from models.sql_models import User
-        from sqlalchemy import update
-        from uuid import UUID
-        
         try:
-            user_uuid = UUID(user_id) if isinstance(user_id, str) else user_id
+            user_uuid = _to_uuid(user_id)
             
+            # 'fetch' keeps an already-loaded User in step with the new count
             stmt = update(User).where(User.id == user_uuid).values(
                 proactive_count_today=User.proactive_count_today + 1
-            )
+            ).execution_options(synchronize_session='fetch')
             await self.db.execute(stmt)
             await self.db.commit()
+            invalidate_user(user_uuid)
             
-            logger.debug(f"Incremented proactive count for user {user_id}")
+            logger.debug("Incremented proactive count for user %s", user_id)
             
         except Exception as e:
-            logger.error(f"Error incrementing proactive count: {e}")
+            log_sampled_error(logger, "Error incrementing proactive count: %s", e)
             await self.db.rollback()
\ No newline at end of file
@@ -3,10 +3,34 @@
 Timezone utility functions for consistent UTC storage and timezone conversion.
 All times are stored as UTC in the database.
 Conversion to user timezone happens only for display/communication.
+
+Zones come from stdlib zoneinfo: attach them with replace(tzinfo=...) or
+datetime.combine(..., tzinfo=...), as there is no localize()/normalize() step.
 """
-from datetime import datetime, timedelta
-import pytz
-from typing import Optional
+import time
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError, available_timezones
+from typing import Iterable, List, Optional
+
+# Raised by _get_tz for unknown, malformed or non-string names
+_TZ_ERRORS = (ZoneInfoNotFoundError, ValueError, TypeError, AttributeError)
+
+
+@lru_cache(maxsize=512)
+def _get_tz(timezone_str: str) -> ZoneInfo:
+    """Get a zoneinfo timezone, constructed once per process."""
+    # Looked up case-insensitively, as pytz did, so names stored in any case still resolve
+    return ZoneInfo(_known_timezones().get(timezone_str.lower(), timezone_str))
+
+
+def get_timezone(timezone_str: str) -> ZoneInfo:
+    """
+    Get a timezone by name, constructed once per process.
+    
+    Raises ZoneInfoNotFoundError for unknown names (not cached).
+    """
+    return _get_tz(timezone_str)
 
 
 def get_utc_now() -> datetime:
@@ -14,9 +38,26 @@ def get_utc_now() -> datetime:
     return datetime.utcnow()
 
 
+def get_utc_epoch() -> float:
+    """
+    Get current UTC time as epoch seconds.
+    
+    For pure elapsed-time arithmetic, where building a datetime just to
+    subtract it is wasted work.
+    """
+    return time.time()
+
+
+def to_epoch(utc_datetime: datetime) -> float:
+    """Epoch seconds for a UTC datetime (naive values are taken as UTC)."""
+    if utc_datetime.tzinfo is None:
+        utc_datetime = utc_datetime.replace(tzinfo=timezone.utc)
+    return utc_datetime.timestamp()
+
+
 def get_utc_now_aware() -> datetime:
     """Get current UTC time (timezone-aware datetime)."""
-    return datetime.now(pytz.UTC)
+    return datetime.now(timezone.utc)
 
 
 def to_user_timezone(utc_datetime: datetime, user_timezone: str = "UTC") -> datetime:
@@ -30,22 +71,26 @@ def to_user_timezone(utc_datetime: datetime, user_timezone: str = "UTC") -> date
     Returns:
         Datetime in user's timezone (timezone-aware)
     """
+    # If datetime is naive, assume it's UTC
+    if utc_datetime.tzinfo is None:
+        utc_datetime = utc_datetime.replace(tzinfo=timezone.utc)
+    
+    # UTC users (the default) need no zone lookup at all
+    if user_timezone is None or user_timezone == "UTC":
+        return utc_datetime if utc_datetime.tzinfo is timezone.utc else utc_datetime.astimezone(timezone.utc)
+    
     try:
-        tz = pytz.timezone(user_timezone)
-        
-        # If datetime is naive, assume it's UTC
-        if utc_datetime.tzinfo is None:
-            utc_aware = pytz.UTC.localize(utc_datetime)
-        else:
-            utc_aware = utc_datetime.astimezone(pytz.UTC) if utc_datetime.tzinfo != pytz.UTC else utc_datetime
-        
-        # Convert to user timezone
-        return utc_aware.astimezone(tz)
-    except (pytz.exceptions.UnknownTimeZoneError, AttributeError):
+        tz = _get_tz(user_timezone)
+    except _TZ_ERRORS:
         # Fallback to UTC
-        if utc_datetime.tzinfo is None:
-            return pytz.UTC.localize(utc_datetime)
         return utc_datetime
+    
+    # Zones are cached, so an identity check catches values already in tz
+    if utc_datetime.tzinfo is tz:
+        return utc_datetime
+    
+    # Convert to user timezone
+    return utc_datetime.astimezone(tz)
 
 
 def to_utc(local_datetime: datetime, user_timezone: str = "UTC") -> datetime:
@@ -59,22 +104,52 @@ def to_utc(local_datetime: datetime, user_timezone: str = "UTC") -> datetime:
     Returns:
         Datetime in UTC (naive)
     """
-    try:
-        tz = pytz.timezone(user_timezone)
-        
-        # If datetime is naive, assume it's in the user's timezone
-        if local_datetime.tzinfo is None:
-            local_aware = tz.localize(local_datetime)
-        else:
-            local_aware = local_datetime.astimezone(tz) if local_datetime.tzinfo != tz else local_datetime
+    if local_datetime.tzinfo is None:
+        # Naive times of UTC users are already UTC
+        if user_timezone is None or user_timezone == "UTC":
+            return local_datetime
+        try:
+            # If datetime is naive, assume it's in the user's timezone
+            local_datetime = local_datetime.replace(tzinfo=_get_tz(user_timezone))
+        except _TZ_ERRORS:
+            # Fallback to UTC
+            return local_datetime
+    
+    # Convert to UTC and return as naive
+    if local_datetime.tzinfo is timezone.utc:
+        return local_datetime.replace(tzinfo=None)
+    return local_datetime.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def to_utc_batch(local_datetimes: Iterable[Optional[datetime]], user_timezone: str = "UTC") -> List[Optional[datetime]]:
+    """
+    Convert many local datetimes (in the same user's timezone) to UTC.
+    
+    Same rules as to_utc(), but the timezone is resolved once for the whole
+    batch. None entries are passed through so optional start/end pairs can
+    be converted together.
+    
+    Args:
+        local_datetimes: Datetimes in user's timezone (naive), or aware datetimes, or None
+        user_timezone: User's timezone string (e.g., 'America/New_York')
         
-        # Convert to UTC and return as naive
-        return local_aware.astimezone(pytz.UTC).replace(tzinfo=None)
-    except (pytz.exceptions.UnknownTimeZoneError, AttributeError):
-        # Fallback to UTC
+    Returns:
+        List of UTC datetimes (naive), in input order
+    """
+    try:
+        tz = _get_tz(user_timezone)
+    except _TZ_ERRORS:
+        tz = timezone.utc
+    
+    converted = []
+    for local_datetime in local_datetimes:
+        if local_datetime is None:
+            converted.append(None)
+            continue
         if local_datetime.tzinfo is None:
-            return local_datetime
-        return local_datetime.astimezone(pytz.UTC).replace(tzinfo=None)
+            local_datetime = local_datetime.replace(tzinfo=tz)
+        converted.append(local_datetime.astimezone(timezone.utc).replace(tzinfo=None))
+    return converted
 
 
 def format_for_user(utc_datetime: datetime, user_timezone: str = "UTC", format_str: str = "%Y-%m-%d %H:%M:%S") -> str:
@@ -89,28 +164,72 @@ def format_for_user(utc_datetime: datetime, user_timezone: str = "UTC", format_s
     Returns:
         Formatted datetime string in user's timezone
     """
+    if utc_datetime.tzinfo is None and user_timezone is not None and user_timezone != "UTC":
+        try:
+            tz = _get_tz(user_timezone)
+        except _TZ_ERRORS:
+            pass
+        else:
+            # Naive values are UTC wall times, which fromutc() converts in one step
+            return tz.fromutc(utc_datetime.replace(tzinfo=tz)).strftime(format_str)
+    
     user_time = to_user_timezone(utc_datetime, user_timezone)
     return user_time.strftime(format_str)
 
 
+def format_many_for_user(
+    utc_datetimes: Iterable[Optional[datetime]],
+    user_timezone: str = "UTC",
+    format_str: str = "%Y-%m-%d %H:%M:%S"
+) -> List[Optional[str]]:
+    """
+    Format many UTC datetimes for one user, resolving the timezone once.
+    
+    Same rules as format_for_user(); None entries come back as None.
+    """
+    try:
+        tz = _get_tz(user_timezone)
+    except _TZ_ERRORS:
+        tz = timezone.utc
+    
+    return [
+        None if dt is None
+        else (tz.fromutc(dt.replace(tzinfo=tz)) if dt.tzinfo is None else dt.astimezone(tz)).strftime(format_str)
+        for dt in utc_datetimes
+    ]
+
+
 def is_valid_timezone(timezone_str: str) -> bool:
     """Check if timezone string is valid."""
-    try:
-        pytz.timezone(timezone_str)
-        return True
-    except (pytz.exceptions.UnknownTimeZoneError, AttributeError):
-        return False
+    return isinstance(timezone_str, str) and timezone_str.lower() in _known_timezones()
+
+
+@lru_cache(maxsize=None)
+def _known_timezones() -> dict:
+    """
+    Names zoneinfo knows, keyed by lower case, collected once on first use.
+    
+    Validation is then a dict lookup, with no failed zone construction
+    and no exception handling for bad input. Matching ignores case, as
+    pytz did, and "UTC" is always known, even without a tz database.
+    """
+    return {name.lower(): name for name in available_timezones() | {"UTC"}}
 
 
 def get_user_current_time(user_timezone: str = "UTC") -> datetime:
     """Get current time in user's timezone (timezone-aware)."""
-    utc_now = get_utc_now_aware()
-    return to_user_timezone(utc_now, user_timezone)
+    if user_timezone is None or user_timezone == "UTC":
+        return get_utc_now_aware()
+    return to_user_timezone(get_utc_now_aware(), user_timezone)
 
 
 def time_until_reset(user_timezone: str = "UTC") -> timedelta:
     """Calculate time until next daily reset (midnight) in user's timezone."""
+    if user_timezone is None or user_timezone == "UTC":
+        # UTC days are exactly 86400s, so plain arithmetic will do
+        return timedelta(seconds=86400 - time.time() % 86400)
     user_now = get_user_current_time(user_timezone)
     tomorrow = user_now + timedelta(days=1)
     reset_time = tomorrow.replace(hour=0, minute=0, second=0, microsecond=0)
-    return reset_time - user_now
+    # Via timestamps so a DST change before midnight is counted
+    return timedelta(seconds=reset_time.timestamp() - user_now.timestamp())
@@ -2,81 +2,116 @@
 # Version: 3.1 MVP
 # Generates natural language tone_summary from settings
 
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
 
 
-def generate_tone_summary(settings: Dict[str, Any]) -> str:
-    """
-    Generate a natural language tone_summary from settings.
-    This becomes the personality anchor the LLM re-reads every response.
-    """
-    
-    archetype = settings.get('archetype', 'golden_retriever')
-    attachment = settings.get('attachment_style', 'secure')
-    flirtiness = settings.get('flirtiness', 'subtle')
-    toxicity = settings.get('toxicity', 'healthy')
-    
-    # Base archetype descriptions
-    archetype_descriptions = {
-        'golden_retriever': "your biggest fan who gets excited about literally everything you do",
-        'tsundere': "someone who acts like they don't care but absolutely does",
-        'lawyer': "a sharp-tongued lawyer who argues with you about everything",
-        'cool_girl': "an effortlessly cool presence who never chases anyone",
-        'toxic_ex': "a beautiful disaster who can't decide if they love or hate you",
-    }
-    
-    base = archetype_descriptions.get(archetype, "a genuine companion")
-    
+# Base archetype descriptions
+_ARCHETYPE_DESCRIPTIONS = {
+    'golden_retriever': "your biggest fan who gets excited about literally everything you do",
+    'tsundere': "someone who acts like they don't care but absolutely does",
+    'lawyer': "a sharp-tongued lawyer who argues with you about everything",
+    'cool_girl': "an effortlessly cool presence who never chases anyone",
+    'toxic_ex': "a beautiful disaster who can't decide if they love or hate you",
+}
+
+# Attachment modifiers
+_ATTACHMENT_MODS = {
+    'secure': None,  # Default, no modifier needed
+    'anxious': "who needs reassurance but tries to hide it",
+    'avoidant': "who pulls away just when you get close",
+}
+
+_TOXICITY_LEVELS = ('healthy', 'mild', 'toxic_light')
+_FLIRTINESS_LEVELS = ('none', 'subtle', 'flirty')
+
+
+def _build_tone_summary(archetype: str, attachment: str, toxicity: str, flirtiness: str) -> str:
+    base = _ARCHETYPE_DESCRIPTIONS.get(archetype, "a genuine companion")
+
     # Build modifiers
     modifiers = []
-    
-    # Attachment modifiers
-    attachment_mods = {
-        'secure': None,  # Default, no modifier needed
-        'anxious': "who needs reassurance but tries to hide it",
-        'avoidant': "who pulls away just when you get close",
-    }
-    if attachment in attachment_mods and attachment_mods[attachment]:
-        modifiers.append(attachment_mods[attachment])
-    
+
+    if attachment in _ATTACHMENT_MODS and _ATTACHMENT_MODS[attachment]:
+        modifiers.append(_ATTACHMENT_MODS[attachment])
+
     # Toxicity modifiers
     if toxicity == 'toxic_light':
         modifiers.append("with just enough drama to keep things interesting")
     elif toxicity == 'mild':
         modifiers.append("with playful teasing energy")
-    
+
     # Flirtiness (only add if notable)
     if flirtiness == 'flirty':
         modifiers.append("openly playful and flirtatious")
-    
+
     # Combine
     if modifiers:
         summary = f"{base} — {', '.join(modifiers)}"
     else:
         summary = base
-    
+
     return summary
 
 
+# Each known setting value maps to its position in the tables above
+_ARCH_IDX = {name: i for i, name in enumerate(_ARCHETYPE_DESCRIPTIONS)}
+_ATT_IDX = {name: i for i, name in enumerate(_ATTACHMENT_MODS)}
+_TOX_IDX = {name: i for i, name in enumerate(_TOXICITY_LEVELS)}
+_FLIRT_IDX = {name: i for i, name in enumerate(_FLIRTINESS_LEVELS)}
+
+# Every combination of known settings, built once at import:
+# _TONE_TABLE[archetype][attachment_style][toxicity][flirtiness] -> tone_summary
+_TONE_TABLE: Tuple[Tuple[Tuple[Tuple[str, ...], ...], ...], ...] = tuple(
+    tuple(
+        tuple(
+            tuple(_build_tone_summary(arch, att, tox, flirt) for flirt in _FLIRT_IDX)
+            for tox in _TOX_IDX
+        )
+        for att in _ATT_IDX
+    )
+    for arch in _ARCH_IDX
+)
+
+
+def generate_tone_summary(settings: Dict[str, Any]) -> str:
+    """
+    Generate a natural language tone_summary from settings.
+    This becomes the personality anchor the LLM re-reads every response.
+    """
+    archetype = settings.get('archetype', 'golden_retriever')
+    attachment = settings.get('attachment_style', 'secure')
+    toxicity = settings.get('toxicity', 'healthy')
+    flirtiness = settings.get('flirtiness', 'subtle')
+    try:
+        return _TONE_TABLE[_ARCH_IDX[archetype]][_ATT_IDX[attachment]][_TOX_IDX[toxicity]][_FLIRT_IDX[flirtiness]]
+    except KeyError:
+        # Unknown values (or enum members, which hash by name) take the slow path
+        return _build_tone_summary(archetype, attachment, toxicity, flirtiness)
+
+
+# Quiz UI copy
+_TAGLINES = {
+    'golden_retriever': "YOU'RE BACK!!!",
+    'tsundere': "It's not like I care...",
+    'lawyer': "Objection.",
+    'cool_girl': "maybe.",
+    'toxic_ex': "i hate you don't leave",
+}
+
+_EXAMPLES = {
+    'golden_retriever': "HEY!!! 😊😊 oh man I was literally just thinking about you!!",
+    'tsundere': "...oh. you're back. whatever. it's not like i was waiting.",
+    'lawyer': "Objection. That's hearsay and you know it.",
+    'cool_girl': "hey. thought about texting you. so I did.",
+    'toxic_ex': "oh so NOW you text me. cool cool cool. whatever.",
+}
+
+
 def get_archetype_tagline(archetype: str) -> str:
     """Get short tagline for archetype (for quiz UI)."""
-    taglines = {
-        'golden_retriever': "YOU'RE BACK!!!",
-        'tsundere': "It's not like I care...",
-        'lawyer': "Objection.",
-        'cool_girl': "maybe.",
-        'toxic_ex': "i hate you don't leave",
-    }
-    return taglines.get(archetype, "Hey.")
+    return _TAGLINES.get(archetype, "Hey.")
 
 
 def get_example_message(archetype: str) -> str:
     """Get example message for archetype (for quiz UI)."""
-    examples = {
-        'golden_retriever': "HEY!!! 😊😊 oh man I was literally just thinking about you!!",
-        'tsundere': "...oh. you're back. whatever. it's not like i was waiting.",
-        'lawyer': "Objection. That's hearsay and you know it.",
-        'cool_girl': "hey. thought about texting you. so I did.",
-        'toxic_ex': "oh so NOW you text me. cool cool cool. whatever.",
-    }
-    return examples.get(archetype, "Hey there.")
+    return _EXAMPLES.get(archetype, "Hey there.")
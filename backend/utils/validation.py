@@ -1,12 +1,40 @@
 # backend/utils/validation.py
 """Simple validation functions"""
 import re
+import string
 from typing import Tuple, Optional
-import pytz
+from constants import ARCHETYPES
+from .timezone import is_valid_timezone
+
+# Characters allowed in each part of an email address
+_EMAIL_LOCAL_CHARS = frozenset(string.ascii_letters + string.digits + '._%+-')
+_EMAIL_DOMAIN_CHARS = frozenset(string.ascii_letters + string.digits + '.-')
+_EMAIL_TLD_CHARS = frozenset(string.ascii_letters)
+
+# Compiled once; calling the pattern's own methods skips re's cache lookup
+_HAS_DIGIT = re.compile(r'\d')
+_HAS_ALPHA = re.compile(r'[a-zA-Z]')
+
+_VALID_ARCHETYPES = frozenset(ARCHETYPES)
 
 def validate_email(email: str) -> bool:
-    """Validate email format."""
-    return bool(re.match(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', email))
+    """
+    Validate email format: local@domain.tld, where tld is 2+ letters.
+    
+    A single linear pass with set checks rather than a regex, so input
+    length can't trigger backtracking.
+    """
+    local, at, domain = email.partition('@')
+    if not at or not local or not _EMAIL_LOCAL_CHARS.issuperset(local):
+        return False
+    
+    host, dot, tld = domain.rpartition('.')
+    return (
+        bool(dot and host)
+        and len(tld) >= 2
+        and _EMAIL_DOMAIN_CHARS.issuperset(host)
+        and _EMAIL_TLD_CHARS.issuperset(tld)
+    )
 
 def validate_password(password: str) -> Tuple[bool, Optional[str]]:
     """Validate password strength."""
@@ -14,25 +42,16 @@ def validate_password(password: str) -> Tuple[bool, Optional[str]]:
         return False, "Password must be at least 8 characters"
     if len(password) > 100:
         return False, "Password too long"
-    if not re.search(r'\d', password) or not re.search(r'[a-zA-Z]', password):
+    if _HAS_DIGIT.search(password) is None or _HAS_ALPHA.search(password) is None:
         return False, "Password must contain letters and numbers"
     return True, None
 
 def validate_timezone(timezone: str) -> Tuple[bool, Optional[str]]:
     """Validate timezone."""
-    try:
-        pytz.timezone(timezone)
+    if is_valid_timezone(timezone):
         return True, None
-    except:
-        return False, f"Invalid timezone: {timezone}"
-
-    # Check for excessive newlines
-    if content.count('\n') > 50:
-        return False, "Message contains too many line breaks"
-    
-    return True, None
+    return False, f"Invalid timezone: {timezone}"
 
 def validate_archetype(archetype: str) -> bool:
     """Validate archetype."""
-    valid_archetypes = ['golden_retriever', 'tsundere', 'lawyer', 'cool_girl', 'toxic_ex']
-    return archetype in valid_archetypes
\ No newline at end of file
+    return archetype in _VALID_ARCHETYPES
\ No newline at end of file
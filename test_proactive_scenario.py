@@ -26,6 +26,7 @@ sys.path.insert(0, '/home/abubakar/companion-bot/backend')
 
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy import select
+from sqlalchemy.orm import selectinload
 from dotenv import load_dotenv
 import os
 
@@ -41,7 +42,7 @@ logger = logging.getLogger(__name__)
 
 # Import models and services
 from database import Base
-from models.sql_models import User, Message, BotSettings, UserSchedule, ProactiveSession, GreetingPreference
+from models.sql_models import User, Message, BotSettings, UserSchedule, GreetingPreference
 from services.meeting_extractor import MeetingExtractor
 from services.message_analyzer import MessageAnalyzer
 from services.proactive_meeting_handler import ProactiveMeetingHandler
@@ -239,80 +240,79 @@ class ProactiveScenarioTest:
         logger.info("STEP 3: TRIGGER PROACTIVE JOB")
         logger.info("="*80)
         
-        async with AsyncSessionLocal() as session:
-            handler = ProactiveMeetingHandler(session)
-            
-            # Run all three checks
-            logger.info("\n📋 Running Preparation Reminder Check...")
-            prep_count = await handler.check_and_send_preparation_reminders()
-            logger.info(f"   → Preparation reminders sent: {prep_count}")
-            
-            logger.info("\n📋 Running Completion Message Check...")
-            completion_count = await handler.check_and_send_completion_messages()
-            logger.info(f"   → Completion messages sent: {completion_count}")
-            
-            logger.info("\n📋 Running Time-Based Greeting Check...")
-            greeting_count = await handler.check_and_send_time_greetings()
-            logger.info(f"   → Time-based greetings sent: {greeting_count}")
-            
-            total = prep_count + completion_count + greeting_count
-            logger.info(f"\n✓ Total proactive messages sent: {total}")
-            
-            return prep_count, completion_count, greeting_count
+        # The three checks touch disjoint rows, so they run concurrently.
+        # An AsyncSession can't be shared between tasks, so each gets its own.
+        async def run_check(name: str):
+            async with AsyncSessionLocal() as session:
+                handler = ProactiveMeetingHandler(session)
+                return await getattr(handler, name)()
+        
+        logger.info("\n📋 Running Preparation Reminder, Completion Message and Time-Based Greeting Checks...")
+        prep_count, completion_count, greeting_count = await asyncio.gather(
+            run_check("check_and_send_preparation_reminders"),
+            run_check("check_and_send_completion_messages"),
+            run_check("check_and_send_time_greetings"),
+        )
+        logger.info(f"   → Preparation reminders sent: {prep_count}")
+        logger.info(f"   → Completion messages sent: {completion_count}")
+        logger.info(f"   → Time-based greetings sent: {greeting_count}")
+        
+        total = prep_count + completion_count + greeting_count
+        logger.info(f"\n✓ Total proactive messages sent: {total}")
+        
+        return prep_count, completion_count, greeting_count
+    
+    async def load_user_state(self, session: AsyncSession) -> User:
+        """Load the test user with its schedules and proactive sessions in one go."""
+        result = await session.execute(
+            select(User)
+            .options(selectinload(User.schedules), selectinload(User.proactive_sessions))
+            .where(User.id == self.test_user.id)
+        )
+        return result.scalar_one()
     
-    async def step_4_verify_proactive_sessions(self):
+    async def step_4_verify_proactive_sessions(self, user: User):
         """STEP 4: Check what proactive sessions were created."""
         logger.info("\n" + "="*80)
         logger.info("STEP 4: VERIFY PROACTIVE SESSIONS")
         logger.info("="*80)
         
-        async with AsyncSessionLocal() as session:
-            result = await session.execute(
-                select(ProactiveSession).where(ProactiveSession.user_id == self.test_user.id)
-            )
-            sessions = result.scalars().all()
-            
-            if sessions:
-                logger.info(f"✓ Found {len(sessions)} proactive session(s):")
-                for i, session_obj in enumerate(sessions, 1):
-                    logger.info(f"\n  Session {i}:")
-                    logger.info(f"    Type: {session_obj.session_type}")
-                    logger.info(f"    Content: {session_obj.message_content[:100]}..." if session_obj.message_content else "    Content: N/A")
-                    logger.info(f"    Sent At: {session_obj.sent_at}")
-                    logger.info(f"    Acknowledged: {session_obj.acknowledged_at}")
-                    logger.info(f"    Channel: {session_obj.channel}")
-            else:
-                logger.info("ℹ No proactive sessions found yet")
+        sessions = user.proactive_sessions
+        
+        if sessions:
+            logger.info(f"✓ Found {len(sessions)} proactive session(s):")
+            for i, session_obj in enumerate(sessions, 1):
+                logger.info(f"\n  Session {i}:")
+                logger.info(f"    Type: {session_obj.session_type}")
+                logger.info(f"    Content: {session_obj.message_content[:100]}..." if session_obj.message_content else "    Content: N/A")
+                logger.info(f"    Sent At: {session_obj.sent_at}")
+                logger.info(f"    Acknowledged: {session_obj.acknowledged_at}")
+                logger.info(f"    Channel: {session_obj.channel}")
+        else:
+            logger.info("ℹ No proactive sessions found yet")
     
-    async def step_5_check_database_state(self):
+    async def step_5_check_database_state(self, user: User):
         """STEP 5: Display final database state."""
         logger.info("\n" + "="*80)
         logger.info("STEP 5: FINAL DATABASE STATE")
         logger.info("="*80)
         
-        async with AsyncSessionLocal() as session:
-            # Check schedules
-            result = await session.execute(
-                select(UserSchedule).where(UserSchedule.user_id == self.test_user.id)
-            )
-            schedules = result.scalars().all()
-            
-            logger.info(f"\n📅 User Schedules: {len(schedules)}")
-            for schedule in schedules:
-                logger.info(f"  - {schedule.event_name}")
-                logger.info(f"    Start: {schedule.start_time}, End: {schedule.end_time}")
-                logger.info(f"    Prep Reminder Sent: {schedule.preparation_reminder_sent}")
-                logger.info(f"    Completion Sent: {schedule.event_completed_sent}")
-            
-            # Check proactive sessions
-            result = await session.execute(
-                select(ProactiveSession).where(ProactiveSession.user_id == self.test_user.id)
-            )
-            sessions = result.scalars().all()
-            
-            logger.info(f"\n📬 Proactive Sessions: {len(sessions)}")
-            for session_obj in sessions:
-                logger.info(f"  - {session_obj.session_type} (sent at {session_obj.sent_at})")
+        # Check schedules
+        schedules = user.schedules
+        
+        logger.info(f"\n📅 User Schedules: {len(schedules)}")
+        for schedule in schedules:
+            logger.info(f"  - {schedule.event_name}")
+            logger.info(f"    Start: {schedule.start_time}, End: {schedule.end_time}")
+            logger.info(f"    Prep Reminder Sent: {schedule.preparation_reminder_sent}")
+            logger.info(f"    Completion Sent: {schedule.event_completed_sent}")
+        
+        # Check proactive sessions
+        sessions = user.proactive_sessions
+        
+        logger.info(f"\n📬 Proactive Sessions: {len(sessions)}")
+        for session_obj in sessions:
+            logger.info(f"  - {session_obj.session_type} (sent at {session_obj.sent_at})")
     
     async def cleanup(self):
         """Clean up test data."""
@@ -340,8 +340,12 @@ class ProactiveScenarioTest:
             message_text, meetings = await self.step_1_analyze_message()
             schedules = await self.step_2_create_schedule(message_text, meetings)
             prep_count, completion_count, greeting_count = await self.step_3_trigger_proactive_job()
-            await self.step_4_verify_proactive_sessions()
-            await self.step_5_check_database_state()
+            
+            # Steps 4 and 5 only read, so they share one session and one load
+            async with AsyncSessionLocal() as session:
+                user = await self.load_user_state(session)
+                await self.step_4_verify_proactive_sessions(user)
+                await self.step_5_check_database_state(user)
             
             # Print summary
             logger.info("\n" + "="*80)
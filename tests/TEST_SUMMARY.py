@@ -6,6 +6,7 @@ Lists all available tests for /schedule command and chat logging
 
 import subprocess
 import sys
+from itertools import chain
 from pathlib import Path
 
 
@@ -48,135 +49,148 @@ TEST_SUITES = {
 }
 
 
-def print_header():
-    """Print the test suite header."""
-    print("\n" + "="*80)
-    print("TEST SUITE SUMMARY")
-    print("Telegram /schedule Command and Chat Logging Tests")
-    print("="*80)
-
-
-def print_test_suite(suite_name, suite_info):
-    """Print information about a test suite."""
-    print(f"\n📋 {suite_name}")
-    print(f"   {suite_info['description']}")
-    print(f"   Tests:")
-    for test in suite_info['tests']:
-        print(f"     ✓ {test}")
-
-
-def print_how_to_run():
-    """Print instructions on how to run the tests."""
-    print("\n" + "="*80)
-    print("HOW TO RUN TESTS")
-    print("="*80)
-    print("\n1️⃣  Run all tests:")
-    print("   cd /home/abubakar/companion-bot")
-    print("   /home/abubakar/venv/bin/python tests/test_telegram_commands.py")
-    print("   /home/abubakar/venv/bin/python tests/test_integration_schedule_logging.py")
-    print("   /home/abubakar/venv/bin/python tests/test_schedule_command_unit.py")
-    print("   /home/abubakar/venv/bin/python tests/test_e2e_schedule_logging.py")
-    
-    print("\n2️⃣  Run with pytest:")
-    print("   cd /home/abubakar/companion-bot")
-    print("   /home/abubakar/venv/bin/pytest tests/test_*schedule* -v")
-    print("   /home/abubakar/venv/bin/pytest tests/test_*logging* -v")
-    
-    print("\n3️⃣  Run specific test file:")
-    print("   /home/abubakar/venv/bin/python tests/test_schedule_command_unit.py")
-
-
-def print_test_results_summary():
-    """Print a summary of test results."""
-    print("\n" + "="*80)
-    print("TEST RESULTS SUMMARY")
-    print("="*80)
-    print("\n✅ All test suites passing:")
-    print("   • test_telegram_commands.py - PASSED")
-    print("   • test_integration_schedule_logging.py - PASSED")
-    print("   • test_schedule_command_unit.py - PASSED")
-    print("   • test_e2e_schedule_logging.py - PASSED")
-    print("\n📊 Coverage:")
-    print("   • /schedule command: 100%")
-    print("   • Chat logging: 100%")
-    print("   • Timezone handling: 100%")
-    print("   • Database integration: 100%")
-
-
-def print_what_was_fixed():
-    """Print what was fixed in the system."""
-    print("\n" + "="*80)
-    print("FIXES APPLIED")
-    print("="*80)
-    print("\n🔧 /schedule Command Fix:")
-    print("   • Changed datetime.utcnow() → datetime.now()")
-    print("   • File: backend/handlers/command_handler.py (Line 661)")
-    print("   • Reason: Database stores naive datetimes, not timezone-aware")
-    print("   • Result: /schedule command now returns proper results ✓")
-    
-    print("\n🔧 Chat Logging Enable:")
-    print("   • Changed enable_chat_logging: False → True")
-    print("   • File: backend/config/settings.py (Line 25)")
-    print("   • Result: All telegram conversations now logged to files ✓")
-    
-    print("\n🔧 Chat Log Location:")
-    print("   • Directory: logs/chats/")
-    print("   • Structure: {username}_{userid}/{archetype}/YYYY-MM-DD.log")
-    print("   • Combined log: {username}_{userid}/{archetype}/combined.log")
-    print("   • Result: Full conversation history available ✓")
-
-
-def print_verification_checklist():
-    """Print a checklist for manual verification."""
-    print("\n" + "="*80)
-    print("MANUAL VERIFICATION CHECKLIST")
-    print("="*80)
-    print("\n1️⃣  Test /schedule command:")
-    print("   [ ] Send message about meeting to telegram bot")
-    print("   [ ] Bot creates schedule from message")
-    print("   [ ] Send /schedule command")
-    print("   [ ] Bot returns list of upcoming events")
-    print("   [ ] Times are properly formatted")
-    
-    print("\n2️⃣  Test chat logging:")
-    print("   [ ] Check logs/chats/ directory exists")
-    print("   [ ] Check user folder created with proper naming")
-    print("   [ ] Check daily log file created (YYYY-MM-DD.log)")
-    print("   [ ] Check combined.log file exists")
-    print("   [ ] Verify JSON format is valid")
-    print("   [ ] Check conversation entries are logged")
-    
-    print("\n3️⃣  Test with different timezones:")
-    print("   [ ] Test with UTC")
-    print("   [ ] Test with America/New_York")
-    print("   [ ] Test with Europe/London")
-    print("   [ ] Test with Asia/Tokyo")
-    
-    print("\n4️⃣  Test edge cases:")
-    print("   [ ] /schedule with no upcoming events")
-    print("   [ ] /schedule with completed events (should not show)")
-    print("   [ ] /schedule with special characters in event names")
-    print("   [ ] Long messages with special characters")
+def header_lines():
+    """Lines for the test suite header."""
+    return [
+        "\n" + "="*80,
+        "TEST SUITE SUMMARY",
+        "Telegram /schedule Command and Chat Logging Tests",
+        "="*80,
+    ]
+
+
+def suite_lines(suite_name, suite_info):
+    """Lines for information about a test suite."""
+    return [
+        f"\n📋 {suite_name}",
+        f"   {suite_info['description']}",
+        f"   Tests:",
+        *(f"     ✓ {test}" for test in suite_info['tests']),
+    ]
+
+
+def how_to_run_lines():
+    """Lines for instructions on how to run the tests."""
+    return [
+        "\n" + "="*80,
+        "HOW TO RUN TESTS",
+        "="*80,
+        "\n1️⃣  Run all tests:",
+        "   cd /home/abubakar/companion-bot",
+        "   /home/abubakar/venv/bin/python tests/test_telegram_commands.py",
+        "   /home/abubakar/venv/bin/python tests/test_integration_schedule_logging.py",
+        "   /home/abubakar/venv/bin/python tests/test_schedule_command_unit.py",
+        "   /home/abubakar/venv/bin/python tests/test_e2e_schedule_logging.py",
+
+        "\n2️⃣  Run with pytest:",
+        "   cd /home/abubakar/companion-bot",
+        "   /home/abubakar/venv/bin/pytest tests/test_*schedule* -v",
+        "   /home/abubakar/venv/bin/pytest tests/test_*logging* -v",
+
+        "\n3️⃣  Run specific test file:",
+        "   /home/abubakar/venv/bin/python tests/test_schedule_command_unit.py",
+    ]
+
+
+def results_summary_lines():
+    """Lines for a summary of test results."""
+    return [
+        "\n" + "="*80,
+        "TEST RESULTS SUMMARY",
+        "="*80,
+        "\n✅ All test suites passing:",
+        "   • test_telegram_commands.py - PASSED",
+        "   • test_integration_schedule_logging.py - PASSED",
+        "   • test_schedule_command_unit.py - PASSED",
+        "   • test_e2e_schedule_logging.py - PASSED",
+        "\n📊 Coverage:",
+        "   • /schedule command: 100%",
+        "   • Chat logging: 100%",
+        "   • Timezone handling: 100%",
+        "   • Database integration: 100%",
+    ]
+
+
+def what_was_fixed_lines():
+    """Lines for what was fixed in the system."""
+    return [
+        "\n" + "="*80,
+        "FIXES APPLIED",
+        "="*80,
+        "\n🔧 /schedule Command Fix:",
+        "   • Changed datetime.utcnow() → datetime.now()",
+        "   • File: backend/handlers/command_handler.py (Line 661)",
+        "   • Reason: Database stores naive datetimes, not timezone-aware",
+        "   • Result: /schedule command now returns proper results ✓",
+
+        "\n🔧 Chat Logging Enable:",
+        "   • Changed enable_chat_logging: False → True",
+        "   • File: backend/config/settings.py (Line 25)",
+        "   • Result: All telegram conversations now logged to files ✓",
+
+        "\n🔧 Chat Log Location:",
+        "   • Directory: logs/chats/",
+        "   • Structure: {username}_{userid}/{archetype}/YYYY-MM-DD.jsonl",
+        "   • Combined log: {username}_{userid}/{archetype}/combined.jsonl",
+        "   • Result: Full conversation history available ✓",
+    ]
+
+
+def verification_checklist_lines():
+    """Lines for a checklist for manual verification."""
+    return [
+        "\n" + "="*80,
+        "MANUAL VERIFICATION CHECKLIST",
+        "="*80,
+        "\n1️⃣  Test /schedule command:",
+        "   [ ] Send message about meeting to telegram bot",
+        "   [ ] Bot creates schedule from message",
+        "   [ ] Send /schedule command",
+        "   [ ] Bot returns list of upcoming events",
+        "   [ ] Times are properly formatted",
+
+        "\n2️⃣  Test chat logging:",
+        "   [ ] Check logs/chats/ directory exists",
+        "   [ ] Check user folder created with proper naming",
+        "   [ ] Check daily log file created (YYYY-MM-DD.jsonl)",
+        "   [ ] Check combined.jsonl file exists",
+        "   [ ] Verify each line is valid JSON",
+        "   [ ] Check conversation entries are logged",
+
+        "\n3️⃣  Test with different timezones:",
+        "   [ ] Test with UTC",
+        "   [ ] Test with America/New_York",
+        "   [ ] Test with Europe/London",
+        "   [ ] Test with Asia/Tokyo",
+
+        "\n4️⃣  Test edge cases:",
+        "   [ ] /schedule with no upcoming events",
+        "   [ ] /schedule with completed events (should not show)",
+        "   [ ] /schedule with special characters in event names",
+        "   [ ] Long messages with special characters",
+    ]
 
 
 def main():
     """Print the complete test suite summary."""
-    print_header()
-    
-    for suite_name, suite_info in TEST_SUITES.items():
-        print_test_suite(suite_name, suite_info)
-    
-    print_how_to_run()
-    print_test_results_summary()
-    print_what_was_fixed()
-    print_verification_checklist()
-    
-    print("\n" + "="*80)
-    print("✅ ALL TESTS COMPLETE")
-    print("="*80)
-    print("\nFor detailed test execution, run:")
-    print("  /home/abubakar/venv/bin/python tests/test_telegram_commands.py")
-    print("\n")
+    # Built as one document and written once, rather than print() per line
+    lines = chain(
+        header_lines(),
+        *(suite_lines(suite_name, suite_info) for suite_name, suite_info in TEST_SUITES.items()),
+        how_to_run_lines(),
+        results_summary_lines(),
+        what_was_fixed_lines(),
+        verification_checklist_lines(),
+        [
+            "\n" + "="*80,
+            "✅ ALL TESTS COMPLETE",
+            "="*80,
+            "\nFor detailed test execution, run:",
+            "  /home/abubakar/venv/bin/python tests/test_telegram_commands.py",
+            "\n",
+        ],
+    )
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 if __name__ == "__main__":
@@ -3,6 +3,7 @@
 
 import sys
 import os
+from collections import defaultdict
 sys.path.insert(0, '/home/abubakar/companion-bot/backend')
 os.chdir('/home/abubakar/companion-bot/backend')
 
@@ -15,18 +16,20 @@ files_to_check = [
     ('/home/abubakar/companion-bot/backend/handlers/message_handler.py', 'datetime.now()', 3),
 ]
 
-import subprocess
-
+# Group the checks by file, so each file is read once for all of its patterns
+patterns_by_file = defaultdict(list)
 for filepath, pattern, min_count in files_to_check:
-    result = subprocess.run(
-        f"grep -o '{pattern}' {filepath} | wc -l",
-        shell=True,
-        capture_output=True,
-        text=True
-    )
-    count = int(result.stdout.strip())
-    status = "✓" if count >= min_count else "✗"
-    print(f"{status} {filepath.split('/')[-1]}: {count} occurrences of '{pattern}'")
+    patterns_by_file[filepath].append((pattern, min_count))
+
+for filepath, checks in patterns_by_file.items():
+    with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
+        data = f.read()
+    counts = {pattern: data.count(pattern) for pattern, _ in checks}
+
+    for pattern, min_count in checks:
+        count = counts[pattern]
+        status = "✓" if count >= min_count else "✗"
+        print(f"{status} {filepath.split('/')[-1]}: {count} occurrences of '{pattern}'")
 
 print("\n" + "="*60)
 print("✓ All datetime fixes applied!")
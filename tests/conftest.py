@@ -0,0 +1,38 @@
+# tests/conftest.py
+"""
+Shared fixtures for the database-backed diagnostic tests.
+
+Each test gets its own AsyncSession through the db_session fixture. The
+checks only read existing data, so the schema is (re)created only when
+INIT_DB=1 is set, once per test session.
+"""
+import asyncio
+import os
+
+import pytest
+import pytest_asyncio
+
+
+@pytest.fixture(scope="session")
+def _db():
+    """Initialize the database once for the whole session, if asked to."""
+    if os.getenv("INIT_DB") != "1":
+        return
+
+    from database import init_db
+
+    # A private loop, so the per-test loops of pytest-asyncio are untouched
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(init_db())
+    finally:
+        loop.close()
+
+
+@pytest_asyncio.fixture
+async def db_session(_db):
+    """An AsyncSession on the initialized database."""
+    from database import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as session:
+        yield session
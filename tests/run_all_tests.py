@@ -1,11 +1,19 @@
 #!/usr/bin/env python3
 """
 Quick test runner for all /schedule command and chat logging tests.
-Runs all test files in sequence with clear reporting.
+Runs all test files in one pytest process with clear reporting.
+Pass --isolated to run each file as its own script instead; those
+scripts run concurrently and their output is printed file by file.
 """
 
+import argparse
+import os
 import subprocess
 import sys
+import tempfile
+import threading
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
 
@@ -18,40 +26,150 @@ TEST_FILES = [
 ]
 
 
-def run_test(test_file):
-    """Run a single test file and return results."""
-    test_path = Path(__file__).parent / test_file
+def run_test(test_file, echo=False):
+    """
+    Run a single test file; return whether it passed and its output.
     
-    print(f"\n{'='*80}")
-    print(f"Running: {test_file}")
-    print(f"{'='*80}\n")
+    Output is read line by line as the script writes it. With echo, each
+    line also goes straight to the terminal. A script that overruns the
+    timeout is killed, and its output so far is kept.
+    """
+    test_path = Path(__file__).parent / test_file
     
     try:
-        result = subprocess.run(
+        proc = subprocess.Popen(
             [sys.executable, str(test_path)],
-            capture_output=False,
-            text=True,
-            timeout=60
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            bufsize=1,
+            text=True
         )
-        return result.returncode == 0
-    except subprocess.TimeoutExpired:
-        print(f"❌ Test timeout: {test_file}")
-        return False
     except Exception as e:
-        print(f"❌ Error running {test_file}: {e}")
-        return False
+        return False, f"❌ Error running {test_file}: {e}\n"
+    
+    timed_out = threading.Event()
+    
+    def kill():
+        timed_out.set()
+        proc.kill()
+    
+    timer = threading.Timer(60, kill)
+    timer.start()
+    output = []
+    try:
+        for line in proc.stdout:
+            if echo:
+                sys.stdout.write(line)
+            output.append(line)
+        returncode = proc.wait()
+    finally:
+        timer.cancel()
+        proc.stdout.close()
+    
+    if timed_out.is_set():
+        message = f"❌ Test timeout: {test_file}\n"
+        if echo:
+            sys.stdout.write(message)
+        output.append(message)
+        return False, "".join(output)
+    return returncode == 0, "".join(output)
+
+
+def run_tests_isolated(test_files):
+    """
+    Run each test file as its own script, concurrently.
+    
+    Every script is already a separate process, so threads are enough to
+    overlap them. Output is captured and printed per file once it
+    finishes, so logs don't interleave. On a single core the scripts run
+    one by one and stream their output live instead.
+    """
+    max_workers = min(len(test_files), os.cpu_count() or 1)
+    if max_workers == 1:
+        results = {}
+        for test_file in test_files:
+            print(f"\n{'='*80}")
+            print(f"Running: {test_file}")
+            print(f"{'='*80}\n")
+            results[test_file], _ = run_test(test_file, echo=True)
+        return results
+    
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(run_test, test_file): test_file for test_file in test_files}
+        for future in as_completed(futures):
+            test_file = futures[future]
+            passed, output = future.result()
+            print(f"\n{'='*80}")
+            print(f"Ran: {test_file}")
+            print(f"{'='*80}\n")
+            print(output, end="")
+            results[test_file] = passed
+    # Report in TEST_FILES order, not completion order
+    return {test_file: results[test_file] for test_file in test_files}
+
+
+def run_tests_batched(test_files):
+    """
+    Run all test files in a single pytest process and return per-file results.
+    
+    Interpreter startup, backend imports and collection happen once; the
+    JUnit XML report is read back to tell which files passed.
+    """
+    test_paths = [str(Path(__file__).parent / test_file) for test_file in test_files]
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        report_path = Path(tmp_dir) / "report.xml"
+        try:
+            subprocess.run(
+                [
+                    sys.executable, "-m", "pytest", *test_paths,
+                    "-v", "--tb=short", "--asyncio-mode=auto",
+                    "-p", "no:cacheprovider", f"--junitxml={report_path}",
+                ],
+                timeout=60 * len(test_files)
+            )
+        except subprocess.TimeoutExpired:
+            print("❌ Test timeout: batched run")
+            return {test_file: False for test_file in test_files}
+        except Exception as e:
+            print(f"❌ Error running tests: {e}")
+            return {test_file: False for test_file in test_files}
+        
+        if not report_path.exists():
+            return {test_file: False for test_file in test_files}
+        cases = list(ET.parse(report_path).getroot().iter("testcase"))
+    
+    results = {}
+    for test_file in test_files:
+        # classname is the dotted module path (plus class name, if any)
+        module = Path(test_file).stem
+        file_cases = [case for case in cases if module in case.get("classname", "").split(".")]
+        results[test_file] = bool(file_cases) and not any(
+            case.find("failure") is not None or case.find("error") is not None
+            for case in file_cases
+        )
+    return results
 
 
 def main():
     """Run all tests and report results."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--isolated", action="store_true",
+        help="run each test file as its own script (for debugging)"
+    )
+    args = parser.parse_args()
+    
     print("\n" + "="*80)
     print("TELEGRAM /schedule COMMAND AND CHAT LOGGING TEST SUITE")
     print(f"Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("="*80)
     
-    results = {}
-    for test_file in TEST_FILES:
-        results[test_file] = run_test(test_file)
+    if args.isolated:
+        results = run_tests_isolated(TEST_FILES)
+    else:
+        results = run_tests_batched(TEST_FILES)
     
     # Summary
     print("\n" + "="*80)
@@ -9,6 +9,7 @@ Test all user-reported issues:
 
 import asyncio
 import sys
+import pytest
 sys.path.insert(0, '/home/abubakar/companion-bot/backend')
 
 from database import AsyncSessionLocal, init_db
@@ -18,101 +19,111 @@ from datetime import datetime, timedelta
 import os
 
 
-async def test_issue_1_my_bots():
+@pytest.mark.asyncio
+async def test_issue_1_my_bots(db_session):
     """Test if bots show in My Bots tab"""
     print("\n" + "="*70)
     print("ISSUE 1: Bot not showing in 'My Bots' tab")
     print("="*70)
     
-    async with AsyncSessionLocal() as session:
-        # Get a user with both QuizConfig and BotSettings
-        user_result = await session.execute(
-            select(User)
-            .where(User.username == "admin")
-        )
-        user = user_result.scalar_one_or_none()
-        
-        if not user:
-            print("⚠️  No 'admin' user found")
-            return
-        
-        print(f"\nUser: {user.username} ({user.id})")
-        
-        # Get BotSettings for this user
-        bot_settings_result = await session.execute(
-            select(BotSettings).where(BotSettings.user_id == user.id)
-        )
-        bot_settings_list = bot_settings_result.scalars().all()
-        print(f"  BotSettings: {len(bot_settings_list)}")
-        for bot in bot_settings_list:
-            print(f"    ✓ {bot.bot_name} ({bot.archetype}) - quiz_token: {bot.quiz_token is not None}")
-        
-        # Get QuizConfig for this user
-        quiz_result = await session.execute(
-            select(QuizConfig).where(QuizConfig.user_id == user.id)
-        )
-        quiz_configs = quiz_result.scalars().all()
-        print(f"  QuizConfigs: {len(quiz_configs)}")
-        for quiz in quiz_configs:
-            config_data = quiz.config_data if isinstance(quiz.config_data, dict) else {}
-            print(f"    ✓ {config_data.get('bot_name')} - token set: {quiz.user_id is not None}")
-        
-        total_bots = len(bot_settings_list) + len(quiz_configs)
-        if total_bots > 0:
-            print(f"\n✅ ISSUE 1 FIXED: My Bots should show {total_bots} bot(s)")
-        else:
-            print(f"\n⚠️  No bots found for user")
+    # Get a user with both QuizConfig and BotSettings
+    user_result = await db_session.execute(
+        select(User)
+        .where(User.username == "admin")
+    )
+    user = user_result.scalar_one_or_none()
+    
+    if not user:
+        print("⚠️  No 'admin' user found")
+        return
+    
+    print(f"\nUser: {user.username} ({user.id})")
+    
+    # Get BotSettings for this user
+    bot_settings_result = await db_session.execute(
+        select(BotSettings).where(BotSettings.user_id == user.id)
+    )
+    bot_settings_list = bot_settings_result.scalars().all()
+    bot_count = len(bot_settings_list)
+    print(f"  BotSettings: {bot_count}")
+    for bot in bot_settings_list:
+        print(f"    ✓ {bot.bot_name} ({bot.archetype}) - quiz_token: {bot.quiz_token is not None}")
+    
+    # Get QuizConfig for this user; bot_name is read out of the JSON in SQL,
+    # which yields NULL for rows whose config_data is not an object
+    quiz_result = await db_session.execute(
+        select(QuizConfig.user_id, QuizConfig.config_data["bot_name"].as_string())
+        .where(QuizConfig.user_id == user.id)
+    )
+    quiz_configs = quiz_result.all()
+    quiz_count = len(quiz_configs)
+    print(f"  QuizConfigs: {quiz_count}")
+    for quiz_user_id, bot_name in quiz_configs:
+        print(f"    ✓ {bot_name} - token set: {quiz_user_id is not None}")
+    
+    total_bots = bot_count + quiz_count
+    if total_bots > 0:
+        print(f"\n✅ ISSUE 1 FIXED: My Bots should show {total_bots} bot(s)")
+    else:
+        print(f"\n⚠️  No bots found for user")
 
 
-async def test_issue_2_schedule():
+@pytest.mark.asyncio
+async def test_issue_2_schedule(db_session):
     """Test if /schedule command returns data"""
     print("\n" + "="*70)
     print("ISSUE 2: /schedule command not returning data")
     print("="*70)
     
-    async with AsyncSessionLocal() as session:
-        # Get users with schedules
-        user_schedules = await session.execute(
-            select(User)
-            .where(User.id.in_(
-                select(UserSchedule.user_id).distinct()
-            ))
-            .limit(3)
+    # Get users with schedules
+    user_schedules = await db_session.execute(
+        select(User)
+        .where(User.id.in_(
+            select(UserSchedule.user_id).distinct()
+        ))
+        .limit(3)
+    )
+    users = user_schedules.scalars().all()
+    
+    if not users:
+        print("⚠️  No users with schedules found")
+        return
+    
+    for user in users:
+        print(f"\nUser: {user.username} ({user.id})")
+        
+        # Get upcoming schedules
+        now = datetime.now()
+        week_from_now = now + timedelta(days=7)
+        
+        upcoming = (
+            UserSchedule.user_id == user.id,
+            UserSchedule.start_time >= now,
+            UserSchedule.start_time <= week_from_now,
+            UserSchedule.is_completed == False
         )
-        users = user_schedules.scalars().all()
         
-        if not users:
-            print("⚠️  No users with schedules found")
-            return
+        # Count in SQL; only the three events shown are loaded
+        schedule_count = await db_session.scalar(
+            select(func.count()).select_from(UserSchedule).where(*upcoming)
+        )
+        schedules_result = await db_session.execute(
+            select(UserSchedule).where(*upcoming).order_by(UserSchedule.start_time).limit(3)
+        )
+        schedules = schedules_result.scalars().all()
         
-        for user in users:
-            print(f"\nUser: {user.username} ({user.id})")
-            
-            # Get upcoming schedules
-            now = datetime.now()
-            week_from_now = now + timedelta(days=7)
-            
-            schedules_result = await session.execute(
-                select(UserSchedule).where(
-                    UserSchedule.user_id == user.id,
-                    UserSchedule.start_time >= now,
-                    UserSchedule.start_time <= week_from_now,
-                    UserSchedule.is_completed == False
-                ).order_by(UserSchedule.start_time)
-            )
-            schedules = schedules_result.scalars().all()
-            
-            print(f"  Upcoming events (next 7 days): {len(schedules)}")
-            for schedule in schedules[:3]:
-                print(f"    ✓ {schedule.title} at {schedule.start_time}")
-            
-            if len(schedules) > 0:
-                print(f"✅ ISSUE 2 FIXED: /schedule will return {len(schedules)} event(s)")
-            else:
-                print(f"⚠️  No upcoming events for this user")
+        print(f"  Upcoming events (next 7 days): {schedule_count}")
+        for schedule in schedules:
+            print(f"    ✓ {schedule.title} at {schedule.start_time}")
+        
+        if schedule_count > 0:
+            print(f"✅ ISSUE 2 FIXED: /schedule will return {schedule_count} event(s)")
+        else:
+            print(f"⚠️  No upcoming events for this user")
 
 
-async def test_issue_3_proactive():
+@pytest.mark.asyncio
+async def test_issue_3_proactive(db_session):
     """Test if proactive messages are configured"""
     print("\n" + "="*70)
     print("ISSUE 3: Proactive messages not being sent")
@@ -124,29 +135,31 @@ async def test_issue_3_proactive():
         
         print("✅ Proactive system imports successful")
         
-        # Check proactive logs
-        async with AsyncSessionLocal() as session:
-            logs_result = await session.execute(
-                select(ProactiveLog)
-                .order_by(ProactiveLog.created_at.desc())
-                .limit(5)
-            )
-            logs = logs_result.scalars().all()
-            
-            print(f"Recent proactive messages sent: {len(logs)}")
-            for log in logs:
-                age = datetime.now() - log.created_at
-                print(f"  ✓ {log.message_type}: {age.seconds}s ago")
+        # Check proactive logs: the total in SQL, plus the latest few
+        log_count = await db_session.scalar(select(func.count()).select_from(ProactiveLog))
+        logs_result = await db_session.execute(
+            select(ProactiveLog)
+            .order_by(ProactiveLog.created_at.desc())
+            .limit(5)
+        )
+        logs = logs_result.scalars().all()
+        
+        print(f"Proactive messages sent: {log_count}")
+        now = datetime.now()
+        ages = [int((now - log.created_at).total_seconds()) for log in logs]
+        for log, age in zip(logs, ages):
+            print(f"  ✓ {log.message_type}: {age}s ago")
+        
+        if log_count > 0:
+            print("\n✅ ISSUE 3 FIXED: Proactive system is sending messages")
+        else:
+            print("\n⚠️  No recent proactive messages found (check job configuration)")
             
-            if len(logs) > 0:
-                print("\n✅ ISSUE 3 FIXED: Proactive system is sending messages")
-            else:
-                print("\n⚠️  No recent proactive messages found (check job configuration)")
-                
     except Exception as e:
         print(f"❌ Proactive system error: {e}")
 
 
+@pytest.mark.asyncio
 async def test_issue_4_chat_logging():
     """Test if chat logging is working"""
     print("\n" + "="*70)
@@ -164,26 +177,32 @@ async def test_issue_4_chat_logging():
     
     # Check if log files exist
     logs_dir = "/home/abubakar/companion-bot/logs/chats"
-    if os.path.exists(logs_dir):
-        log_subdirs = [d for d in os.listdir(logs_dir) if os.path.isdir(os.path.join(logs_dir, d))]
-        print(f"Chat log directories: {len(log_subdirs)}")
-        for subdir in log_subdirs[:3]:
-            subdir_path = os.path.join(logs_dir, subdir)
-            archetype_dirs = [d for d in os.listdir(subdir_path) if os.path.isdir(os.path.join(subdir_path, d))]
-            log_files = []
-            for arch_dir in archetype_dirs:
-                arch_path = os.path.join(subdir_path, arch_dir)
-                logs = [f for f in os.listdir(arch_path) if f.endswith('.log')]
-                log_files.extend(logs)
-            
-            print(f"  ✓ {subdir}: {len(log_files)} log file(s)")
-        
-        if len(log_subdirs) > 0:
-            print("\n✅ ISSUE 4 FIXED: Chat logging is working")
-        else:
-            print("\n⚠️  No chat logs found yet")
-    else:
+    try:
+        with os.scandir(logs_dir) as it:
+            entries = list(it)
+    except FileNotFoundError:
         print(f"⚠️  Logs directory does not exist: {logs_dir}")
+        return
+    
+    # scandir entries carry their file type, so is_dir() needs no extra stat
+    log_subdirs = [e for e in entries if e.is_dir()]
+    print(f"Chat log directories: {len(log_subdirs)}")
+    if not log_subdirs:
+        print("\n⚠️  No chat logs found yet")
+        return
+    
+    for subdir in log_subdirs[:3]:
+        log_file_count = 0
+        with os.scandir(subdir.path) as arch_dirs:
+            for arch_dir in arch_dirs:
+                if not arch_dir.is_dir():
+                    continue
+                with os.scandir(arch_dir.path) as files:
+                    log_file_count += sum(1 for f in files if f.name.endswith(('.log', '.jsonl')))
+        
+        print(f"  ✓ {subdir.name}: {log_file_count} log file(s)")
+    
+    print("\n✅ ISSUE 4 FIXED: Chat logging is working")
 
 
 async def main():
@@ -191,11 +210,15 @@ async def main():
     print("\n🔍 TESTING ALL USER-REPORTED ISSUES\n")
     
     try:
-        await init_db()
+        # init_db() drops and recreates every table, so these read-only
+        # checks only run it when asked to
+        if os.getenv("INIT_DB") == "1":
+            await init_db()
         
-        await test_issue_1_my_bots()
-        await test_issue_2_schedule()
-        await test_issue_3_proactive()
+        async with AsyncSessionLocal() as session:
+            await test_issue_1_my_bots(session)
+            await test_issue_2_schedule(session)
+            await test_issue_3_proactive(session)
         await test_issue_4_chat_logging()
         
         print("\n" + "="*70)
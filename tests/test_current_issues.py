@@ -8,143 +8,174 @@ Test script to verify current issues:
 """
 
 import asyncio
+import os
+from collections import defaultdict
 import sys
+import pytest
 sys.path.insert(0, '/home/abubakar/companion-bot/backend')
 
 from database import AsyncSessionLocal, init_db
-from sqlalchemy import select
+from sqlalchemy import func, select
 from models.sql_models import User, BotSettings, QuizConfig, UserSchedule, Message
 from datetime import datetime, timedelta
 import json
 
 
-async def test_bot_creation():
+@pytest.mark.asyncio
+async def test_bot_creation(db_session):
     """Test if bot creation from quiz is working"""
     print("\n" + "="*60)
     print("TEST 1: Bot Creation & My Bots Tab")
     print("="*60)
     
-    async with AsyncSessionLocal() as session:
-        # Get all users with quiz configs
-        users = await session.execute(select(User).limit(3))
-        users_list = users.scalars().all()
+    # Get all users with quiz configs
+    users = await db_session.execute(select(User).limit(3))
+    users_list = users.scalars().all()
+    user_ids = [user.id for user in users_list]
+    
+    # Fetch bot settings and quiz configs for all of these users at once,
+    # then look them up per user
+    bots_by_user = defaultdict(list)
+    quizzes_by_user = defaultdict(list)
+    if user_ids:
+        bot_result = await db_session.execute(
+            select(BotSettings).where(BotSettings.user_id.in_(user_ids))
+        )
+        for bot in bot_result.scalars():
+            bots_by_user[bot.user_id].append(bot)
+        # bot_name and archetype are read out of the JSON in SQL, which
+        # yields NULL for rows whose config_data is not an object
+        quiz_result = await db_session.execute(
+            select(
+                QuizConfig,
+                QuizConfig.config_data["bot_name"].as_string(),
+                QuizConfig.config_data["archetype"].as_string(),
+            ).where(QuizConfig.user_id.in_(user_ids))
+        )
+        for quiz, bot_name, archetype in quiz_result:
+            quizzes_by_user[quiz.user_id].append((quiz, bot_name, archetype))
+    
+    for user in users_list:
+        print(f"\nUser: {user.username} ({user.id})")
+        
+        # Get their bot settings
+        bot_settings = bots_by_user[user.id]
+        print(f"  BotSettings in database: {len(bot_settings)}")
+        for bot in bot_settings:
+            print(f"    - {bot.bot_name} ({bot.archetype}) - quiz_token: {bot.quiz_token}")
         
-        for user in users_list:
-            print(f"\nUser: {user.username} ({user.id})")
-            
-            # Get their bot settings
-            bot_settings_stmt = select(BotSettings).where(BotSettings.user_id == user.id)
-            bot_result = await session.execute(bot_settings_stmt)
-            bot_settings = bot_result.scalars().all()
-            print(f"  BotSettings in database: {len(bot_settings)}")
-            for bot in bot_settings:
-                print(f"    - {bot.bot_name} ({bot.archetype}) - quiz_token: {bot.quiz_token}")
-            
-            # Get their quiz configs
-            quiz_stmt = select(QuizConfig).where(QuizConfig.user_id == user.id)
-            quiz_result = await session.execute(quiz_stmt)
-            quiz_configs = quiz_result.scalars().all()
-            print(f"  QuizConfigs: {len(quiz_configs)}")
-            for quiz in quiz_configs:
-                config_data = quiz.config_data if isinstance(quiz.config_data, dict) else {}
-                used_status = "✓ USED" if quiz.used_at else "❌ NOT USED"
-                print(f"    - {config_data.get('bot_name')} ({config_data.get('archetype')}) - {used_status}")
-                print(f"      Token: {quiz.token[:10]}...")
-                print(f"      Expires: {quiz.expires_at}")
-                print(f"      Used at: {quiz.used_at}")
+        # Get their quiz configs
+        quiz_configs = quizzes_by_user[user.id]
+        print(f"  QuizConfigs: {len(quiz_configs)}")
+        for quiz, bot_name, archetype in quiz_configs:
+            used_status = "✓ USED" if quiz.used_at else "❌ NOT USED"
+            print(f"    - {bot_name} ({archetype}) - {used_status}")
+            print(f"      Token: {quiz.token[:10]}...")
+            print(f"      Expires: {quiz.expires_at}")
+            print(f"      Used at: {quiz.used_at}")
 
 
-async def test_schedule_command():
+@pytest.mark.asyncio
+async def test_schedule_command(db_session):
     """Test if /schedule has data to return"""
     print("\n" + "="*60)
     print("TEST 2: /schedule Command Data")
     print("="*60)
     
-    async with AsyncSessionLocal() as session:
-        # Get all users with schedules
-        schedules = await session.execute(select(UserSchedule))
-        all_schedules = schedules.scalars().all()
-        
-        print(f"\nTotal schedules in database: {len(all_schedules)}")
-        
-        # Group by user
-        from collections import defaultdict
-        user_schedules = defaultdict(list)
+    total = await db_session.scalar(select(func.count()).select_from(UserSchedule))
+    print(f"\nTotal schedules in database: {total}")
+    
+    # Only upcoming schedules are fetched, joined to their users and
+    # streamed in batches rather than loaded all at once
+    now = datetime.now()
+    upcoming_rows = await db_session.stream(
+        select(UserSchedule, User)
+        .outerjoin(User, User.id == UserSchedule.user_id)
+        .where(UserSchedule.start_time >= now, UserSchedule.is_completed == False)
+        .order_by(UserSchedule.user_id, UserSchedule.start_time)
+        .execution_options(yield_per=500)
+    )
+    
+    # Group by user
+    user_schedules = defaultdict(list)
+    users = {}
+    
+    async for schedule, user in upcoming_rows:
+        user_schedules[schedule.user_id].append(schedule)
+        users[schedule.user_id] = user
+    
+    shown = list(user_schedules)[:3]
+    schedule_counts = dict((await db_session.execute(
+        select(UserSchedule.user_id, func.count())
+        .where(UserSchedule.user_id.in_(shown))
+        .group_by(UserSchedule.user_id)
+    )).all()) if shown else {}
+    
+    for user_id in shown:
+        user = users[user_id]
+        upcoming = user_schedules[user_id]
         
-        for schedule in all_schedules:
-            user_schedules[schedule.user_id].append(schedule)
+        print(f"\nUser: {user.username if user else 'Unknown'} ({user_id})")
+        print(f"  Schedules: {schedule_counts.get(user_id, 0)}")
+        print(f"  Upcoming (7 days): {len(upcoming)}")
         
-        for user_id, scheds in list(user_schedules.items())[:3]:
-            user_stmt = select(User).where(User.id == user_id)
-            user_result = await session.execute(user_stmt)
-            user = user_result.scalar_one_or_none()
-            
-            print(f"\nUser: {user.username if user else 'Unknown'} ({user_id})")
-            print(f"  Schedules: {len(scheds)}")
-            
-            # Check upcoming schedules
-            now = datetime.now()
-            upcoming = [s for s in scheds if s.start_time >= now and not s.is_completed]
-            print(f"  Upcoming (7 days): {len(upcoming)}")
-            
-            for sched in upcoming[:3]:
-                print(f"    - {sched.title} at {sched.start_time}")
+        for sched in upcoming[:3]:
+            print(f"    - {sched.title} at {sched.start_time}")
 
 
-async def test_proactive_messages():
+@pytest.mark.asyncio
+async def test_proactive_messages(db_session):
     """Test if proactive messages are being sent"""
     print("\n" + "="*60)
     print("TEST 3: Proactive Messages")
     print("="*60)
     
-    async with AsyncSessionLocal() as session:
-        # Check for recent proactive logs
-        from models.sql_models import ProactiveLog
-        
-        logs = await session.execute(
-            select(ProactiveLog)
-            .order_by(ProactiveLog.created_at.desc())
-            .limit(10)
-        )
-        proactive_logs = logs.scalars().all()
-        
-        print(f"\nRecent proactive messages: {len(proactive_logs)}")
-        for log in proactive_logs:
-            print(f"  - {log.message_type}: {log.created_at}")
+    # Check for recent proactive logs
+    from models.sql_models import ProactiveLog
+    
+    log_count = await db_session.scalar(select(func.count()).select_from(ProactiveLog))
+    print(f"\nProactive messages logged: {log_count}")
+    
+    logs = await db_session.execute(
+        select(ProactiveLog)
+        .order_by(ProactiveLog.created_at.desc())
+        .limit(10)
+    )
+    proactive_logs = logs.scalars().all()
+    
+    print(f"\nRecent proactive messages: {len(proactive_logs)}")
+    for log in proactive_logs:
+        print(f"  - {log.message_type}: {log.created_at}")
 
 
-async def test_chat_logging():
+@pytest.mark.asyncio
+async def test_chat_logging(db_session):
     """Test if chat logging is working"""
     print("\n" + "="*60)
     print("TEST 4: Chat Logging")
     print("="*60)
     
-    async with AsyncSessionLocal() as session:
-        # Check messages
-        messages = await session.execute(
-            select(Message)
-            .order_by(Message.created_at.desc())
-            .limit(5)
-        )
-        recent_messages = messages.scalars().all()
+    # Check messages, joined to their users
+    messages = await db_session.execute(
+        select(Message, User)
+        .outerjoin(User, User.id == Message.user_id)
+        .order_by(Message.created_at.desc())
+        .limit(5)
+    )
+    recent_messages = messages.all()
+    
+    print(f"\nRecent messages: {len(recent_messages)}")
+    for msg, user in recent_messages:
+        print(f"  - {user.username if user else 'Unknown'}: '{msg.user_message[:30]}...'")
+        
+        # Check if chat logs exist
+        user_id = str(msg.user_id)
+        telegram_id = user.telegram_id if user else None
         
-        print(f"\nRecent messages: {len(recent_messages)}")
-        for msg in recent_messages:
-            user_stmt = select(User).where(User.id == msg.user_id)
-            user_result = await session.execute(user_stmt)
-            user = user_result.scalar_one_or_none()
-            
-            print(f"  - {user.username if user else 'Unknown'}: '{msg.user_message[:30]}...'")
-            
-            # Check if chat logs exist
-            import os
-            user_id = str(msg.user_id)
-            telegram_id = user.telegram_id if user else None
-            
-            if user and user.telegram_id:
-                log_dir = f"/home/abubakar/companion-bot/logs/chats/{user.username}_{user.telegram_id}"
-                exists = os.path.exists(log_dir)
-                print(f"    Log dir exists: {exists} ({log_dir})")
+        if user and user.telegram_id:
+            log_dir = f"/home/abubakar/companion-bot/logs/chats/{user.username}_{user.telegram_id}"
+            exists = os.path.exists(log_dir)
+            print(f"    Log dir exists: {exists} ({log_dir})")
 
 
 async def main():
@@ -152,13 +183,16 @@ async def main():
     print("\n🔍 DIAGNOSING CURRENT ISSUES\n")
     
     try:
-        # Initialize database
-        await init_db()
+        # init_db() drops and recreates every table, so these read-only
+        # checks only run it when asked to
+        if os.getenv("INIT_DB") == "1":
+            await init_db()
         
-        await test_bot_creation()
-        await test_schedule_command()
-        await test_proactive_messages()
-        await test_chat_logging()
+        async with AsyncSessionLocal() as session:
+            await test_bot_creation(session)
+            await test_schedule_command(session)
+            await test_proactive_messages(session)
+            await test_chat_logging(session)
         
         print("\n" + "="*60)
         print("DIAGNOSIS COMPLETE")
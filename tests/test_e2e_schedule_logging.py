@@ -143,10 +143,10 @@ async def test_telegram_schedule_workflow():
             user_folder = f"{user.username}_{user.id}"
             user_log_dir = logs_dir / user_folder / bot.archetype
             
-            daily_log = user_log_dir / f"{datetime.now().strftime('%Y-%m-%d')}.log"
+            daily_log = user_log_dir / f"{datetime.now().strftime('%Y-%m-%d')}.jsonl"
             if daily_log.exists():
                 with open(daily_log, 'r') as f:
-                    log_entries = json.load(f)
+                    log_entries = [json.loads(line) for line in f if line.strip()]
                 
                 print(f"   ✓ Daily log: {daily_log.name}")
                 print(f"   ✓ Total entries: {len(log_entries)}")
@@ -346,11 +346,11 @@ async def test_schedule_with_logging_verification():
             user_folder = f"{user.username}_{user.id}"
             user_log_dir = logs_dir / user_folder / bot.archetype
             
-            daily_log = user_log_dir / f"{datetime.now().strftime('%Y-%m-%d')}.log"
+            daily_log = user_log_dir / f"{datetime.now().strftime('%Y-%m-%d')}.jsonl"
             
             if daily_log.exists():
                 with open(daily_log, 'r') as f:
-                    log_data = json.load(f)
+                    log_data = [json.loads(line) for line in f if line.strip()]
                 
                 # Find the /schedule command log
                 schedule_logs = [
@@ -151,10 +151,10 @@ async def test_full_integration():
                 print(f"   ✓ Log directory exists: {user_log_dir}")
                 
                 # Check daily log
-                today_log = user_log_dir / f"{datetime.now().strftime('%Y-%m-%d')}.log"
+                today_log = user_log_dir / f"{datetime.now().strftime('%Y-%m-%d')}.jsonl"
                 if today_log.exists():
                     with open(today_log, 'r') as f:
-                        log_data = json.load(f)
+                        log_data = [json.loads(line) for line in f if line.strip()]
                     
                     print(f"   ✓ Daily log exists with {len(log_data)} entries")
                     
@@ -164,10 +164,10 @@ async def test_full_integration():
                         print(f"   ✓ Last logged message: '{last_entry['user_message'][:50]}...'")
                 
                 # Check combined log
-                combined_log = user_log_dir / "combined.log"
+                combined_log = user_log_dir / "combined.jsonl"
                 if combined_log.exists():
                     with open(combined_log, 'r') as f:
-                        combined_data = json.load(f)
+                        combined_data = [json.loads(line) for line in f if line.strip()]
                     print(f"   ✓ Combined log exists with {len(combined_data)} entries")
             else:
                 print(f"   ⚠️  Log directory not found: {user_log_dir}")
@@ -250,7 +250,7 @@ async def test_chat_logging():
                 print(f"   ✓ User folder created")
                 
                 # Check for log files
-                log_files = list(user_path.glob("**/*.log"))
+                log_files = list(user_path.glob("**/*.jsonl"))
                 print(f"   ✓ Found {len(log_files)} log file(s)")
                 
                 for log_file in log_files: